@@ -2,13 +2,34 @@ import torch
 import torch.nn as nn
 import os
 import argparse
-from src.data_loader import load_dataset
+from src.data_loader import load_dataset, CLASS_NAMES
 from src.models import get_model, freeze_layers, count_parameters
 from src.train import train_model, get_optimizer, get_scheduler
-from src.evaluate import evaluate_model, get_model_complexity, print_metrics, compare_models
-from src.visualize import (plot_training_history, plot_confusion_matrix, 
-                          plot_metrics_comparison, plot_efficiency_comparison,
-                          save_results_to_csv)
+from src.evaluate import (evaluate_model, get_model_complexity, get_memory_footprint,
+                          print_metrics, compare_models)
+from src.reporting import Reporter
+from src.profiler import TrainingProfiler
+from src.cascade import run_cascade, cascade_name, CONFIDENCE_CRITERIA
+
+
+def positive_int(value):
+    
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"Esperado inteiro >= 1, recebido: {value}")
+    return number
+
+
+def parse_step_range(value):
+    # Usado como type= do argparse: entradas inválidas viram erro de uso antes do treino
+    try:
+        start, end = (int(v) for v in value.split(':'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Intervalo de passos deve ser inicio:fim, recebido: {value}")
+    if start < 0 or end <= start:
+        raise argparse.ArgumentTypeError(f"Intervalo de passos inválido: {value}")
+    return start, end
+
 
 def main(args):
    
@@ -33,99 +54,147 @@ def main(args):
     )
     
     
-    class_names = {
-        'CIFAR10': ['airplane', 'automobile', 'bird', 'cat', 'deer', 
-                   'dog', 'frog', 'horse', 'ship', 'truck'],
-        'MNIST': [str(i) for i in range(10)],
-        'FashionMNIST': ['T-shirt', 'Trouser', 'Pullover', 'Dress', 'Coat',
-                        'Sandal', 'Shirt', 'Sneaker', 'Bag', 'Ankle boot']
-    }
-    
+    class_names = CLASS_NAMES.get(args.dataset) or test_loader.dataset.classes
     
     models_to_train = args.models.split(',')
     
-    all_results = {}
+    reporter = Reporter(mode=args.report_mode)
+    
+    try:
+        all_results = {}
+        trained_models = {}
     
-    for model_name in models_to_train:
-        print(f"\n{'='*70}")
-        print(f" INICIANDO TREINAMENTO: {model_name.upper()}")
-        print(f"{'='*70}\n")
+        for model_name in models_to_train:
+            print(f"\n{'='*70}")
+            print(f" INICIANDO TREINAMENTO: {model_name.upper()}")
+            print(f"{'='*70}\n")
         
         
-        print(f"Criando modelo {model_name}...")
-        model = get_model(model_name, num_classes=num_classes, pretrained=True)
+            print(f"Criando modelo {model_name}...")
+            model = get_model(model_name, num_classes=num_classes, pretrained=True,
+                              weight_store=args.weight_store)
         
      
-        if args.freeze_layers != 'none':
-            print(f"Congelando camadas: {args.freeze_layers}")
-            model = freeze_layers(model, model_name, args.freeze_layers)
+            if args.freeze_layers != 'none':
+                print(f"Congelando camadas: {args.freeze_layers}")
+                model = freeze_layers(model, model_name, args.freeze_layers)
         
       
-        params_info = count_parameters(model)
-        print(f"\nParâmetros totais: {params_info['total']:,}")
-        print(f"Parâmetros treináveis: {params_info['trainable']:,}")
-        print(f"Parâmetros congelados: {params_info['frozen']:,}")
+            params_info = count_parameters(model)
+            print(f"\nParâmetros totais: {params_info['total']:,}")
+            print(f"Parâmetros treináveis: {params_info['trainable']:,}")
+            print(f"Parâmetros congelados: {params_info['frozen']:,}")
+        
         
+            criterion = nn.CrossEntropyLoss()
+            optimizer = get_optimizer(model, args.optimizer, args.learning_rate)
+            scheduler = get_scheduler(optimizer, args.scheduler) if args.use_scheduler else None
         
-        criterion = nn.CrossEntropyLoss()
-        optimizer = get_optimizer(model, args.optimizer, args.learning_rate)
-        scheduler = get_scheduler(optimizer, args.scheduler) if args.use_scheduler else None
         
+            profiler = None
+            if args.profile:
+                profiler = TrainingProfiler(device=device,
+                                            trace_steps=args.profile_trace_steps,
+                                            trace_name=f"{model_name}_{args.dataset}")
         
-        print(f"\n  Iniciando treinamento...")
-        trained_model, history = train_model(
-            model=model,
-            train_loader=train_loader,
-            test_loader=test_loader,
-            criterion=criterion,
-            optimizer=optimizer,
-            scheduler=scheduler,
-            num_epochs=args.num_epochs,
-            device=device
-        )
+            print(f"\n  Iniciando treinamento...")
+            trained_model, history = train_model(
+                model=model,
+                train_loader=train_loader,
+                test_loader=test_loader,
+                criterion=criterion,
+                optimizer=optimizer,
+                scheduler=scheduler,
+                num_epochs=args.num_epochs,
+                device=device,
+                val_subset_size=args.val_subset_size,
+                val_every=args.val_every,
+                val_confidence=args.val_confidence,
+                loss_sampling=args.loss_sampling,
+                skip_fraction=args.skip_fraction,
+                sampling_warmup_epochs=args.sampling_warmup_epochs,
+                profiler=profiler
+            )
         
       
-        model_path = f'models/best_models/{model_name}_{args.dataset}.pth'
-        torch.save(trained_model.state_dict(), model_path)
-        print(f"✓ Modelo salvo em: {model_path}")
+            model_path = f'models/best_models/{model_name}_{args.dataset}.pth'
+            torch.save(trained_model.state_dict(), model_path)
+            print(f"✓ Modelo salvo em: {model_path}")
         
         
-        plot_training_history(history, f"{model_name}_{args.dataset}")
+            reporter.submit('plot_training_history', history, f"{model_name}_{args.dataset}")
         
        
-        print(f"\n Avaliando modelo {model_name}...")
-        metrics = evaluate_model(trained_model, test_loader, device)
+            print(f"\n Avaliando modelo {model_name}...")
+            metrics = evaluate_model(trained_model, test_loader, device)
         
        
-        complexity = get_model_complexity(trained_model, 
-                                         input_size=(3, args.input_size, args.input_size),
-                                         device=device)
-        metrics.update(complexity)
+            complexity = get_model_complexity(trained_model, 
+                                             input_size=(3, args.input_size, args.input_size),
+                                             device=device)
+            metrics.update(complexity)
         
+            if args.profile_memory:
+                batch_sizes = ([int(b) for b in args.memory_batch_sizes.split(',')]
+                               if args.memory_batch_sizes else sorted({1, args.batch_size}))
+                footprint = get_memory_footprint(trained_model,
+                                                 input_size=(3, args.input_size, args.input_size),
+                                                 batch_sizes=batch_sizes, device=device)
+                metrics.update(footprint)
+                reporter.submit('save_activation_memory_to_csv', footprint['memory'],
+                                f"{model_name}_{args.dataset}")
         
-        print_metrics(metrics, model_name, args.dataset)
+        
+            print_metrics(metrics, model_name, args.dataset)
         
        
-        plot_confusion_matrix(metrics['confusion_matrix'], 
-                            class_names[args.dataset],
+            reporter.submit('plot_confusion_matrix', metrics['confusion_matrix'],
+                            class_names,
                             f"{model_name}_{args.dataset}")
         
        
-        all_results[model_name] = metrics
+            all_results[model_name] = metrics
+            if args.cascade:
+                trained_models[model_name] = trained_model
+    
+    
+        if args.cascade and len(trained_models) > 1:
+            # Barato = menor latência medida; grande = maior acurácia
+            small_name = min(trained_models, key=lambda m: all_results[m]['avg_inference_time'])
+            large_name = max(trained_models, key=lambda m: all_results[m]['accuracy'])
+        
+            if small_name == large_name:
+                print(f"\n{small_name} já é o modelo mais rápido e o mais preciso; cascata ignorada")
+            else:
+                name = cascade_name(small_name, large_name)
+                print(f"\n Avaliando cascata {small_name} → {large_name}...")
+                metrics = run_cascade(trained_models[small_name], trained_models[large_name],
+                                      test_loader, target_accuracy=args.cascade_target_accuracy,
+                                      criterion=args.cascade_criterion, device=device)
+                # As duas redes precisam estar implantadas
+                for key in ('total_params', 'trainable_params', 'model_size_mb'):
+                    metrics[key] = all_results[small_name][key] + all_results[large_name][key]
+            
+                print_metrics(metrics, name, args.dataset)
+                all_results[name] = metrics
     
     
-    if len(all_results) > 1:
-        print("\n" + "="*80)
-        print(" COMPARAÇÃO FINAL DE TODOS OS MODELOS")
-        print("="*80)
-        compare_models(all_results)
+        if len(all_results) > 1:
+            print("\n" + "="*80)
+            print(" COMPARAÇÃO FINAL DE TODOS OS MODELOS")
+            print("="*80)
+            compare_models(all_results)
         
         
-        plot_metrics_comparison(all_results)
-        plot_efficiency_comparison(all_results)
+            reporter.submit('plot_metrics_comparison', all_results)
+            reporter.submit('plot_efficiency_comparison', all_results)
         
        
-        save_results_to_csv(all_results, args.dataset)
+            reporter.submit('save_results_to_csv', all_results, args.dataset)
+    
+    finally:
+        # Garante que os relatórios já enfileirados sejam gerados mesmo se um modelo falhar
+        reporter.close()
     
     print(f"\n Processo finalizado!")
     print(f" Resultados salvos em: ./results/")
@@ -135,8 +204,9 @@ if __name__ == '__main__':
     
   
     parser.add_argument('--dataset', type=str, default='CIFAR10',
-                       choices=['MNIST', 'CIFAR10', 'FashionMNIST'],
-                       help='Dataset a ser utilizado')
+                       choices=['MNIST', 'CIFAR10', 'FashionMNIST', 'Shards'],
+                       help='Dataset a ser utilizado (Shards: data_dir/train e data_dir/test '
+                            'gerados com python -m src.shards)')
     parser.add_argument('--data_dir', type=str, default='./data',
                        help='Diretório para salvar os dados')
     parser.add_argument('--batch_size', type=int, default=32,
@@ -150,6 +220,9 @@ if __name__ == '__main__':
     parser.add_argument('--freeze_layers', type=str, default='partial',
                        choices=['none', 'all', 'partial'],
                        help='Estratégia de congelamento de camadas')
+    parser.add_argument('--weight_store', type=str, default=None,
+                       help='Diretório local de pesos pré-treinados carregados com mmap '
+                            '(preenchido no primeiro uso)')
     
   
     parser.add_argument('--num_epochs', type=int, default=10,
@@ -165,5 +238,57 @@ if __name__ == '__main__':
                        choices=['step', 'cosine'],
                        help='Tipo de scheduler')
     
+    
+    parser.add_argument('--val_subset_size', type=positive_int, default=None,
+                       help='Validar por época em subconjunto estratificado deste tamanho '
+                            '(avaliação completa só para candidatos a melhor modelo e no fim)')
+    parser.add_argument('--val_every', type=positive_int, default=1,
+                       help='Validar a cada k épocas')
+    parser.add_argument('--val_confidence', type=float, default=0.95,
+                       help='Nível de confiança do intervalo da acurácia no subconjunto')
+    
+    
+    parser.add_argument('--loss_sampling', action='store_true',
+                       help='Amostrar o treino ponderando pela perda de cada amostra')
+    parser.add_argument('--skip_fraction', type=float, default=0.0,
+                       help='Fração das amostras mais fáceis de cada batch que não recebem '
+                            'backward (requer --loss_sampling)')
+    parser.add_argument('--sampling_warmup_epochs', type=int, default=1,
+                       help='Épocas com amostragem uniforme antes da amostragem por perda')
+    
+    
+    parser.add_argument('--profile', action='store_true',
+                       help='Medir tempo por etapa do treino (dados, cópia, forward, backward, otimizador)')
+    parser.add_argument('--profile_trace_steps', type=parse_step_range, default=None,
+                       help='Intervalo de passos inicio:fim para capturar trace do torch.profiler')
+    parser.add_argument('--profile_memory', action='store_true',
+                       help='Medir pico de RSS (inferência e treino), tamanho serializado '
+                            'e memória de ativações por camada')
+    parser.add_argument('--memory_batch_sizes', type=str, default=None,
+                       help='Batch sizes separados por vírgula para medir memória '
+                            '(padrão: 1 e --batch_size)')
+    
+    
+    parser.add_argument('--cascade', action='store_true',
+                       help='Avaliar a cascata: modelo mais rápido primeiro, amostras pouco '
+                            'confiantes escalonadas para o mais preciso')
+    parser.add_argument('--cascade_target_accuracy', type=float, default=None,
+                       help='Acurácia alvo usada para calibrar o limiar no conjunto de teste '
+                            '(padrão: a do modelo mais preciso)')
+    parser.add_argument('--cascade_criterion', type=str, default='margin',
+                       choices=CONFIDENCE_CRITERIA,
+                       help='Confiança do modelo barato: margem top-1/top-2 ou entropia')
+    
+    
+    parser.add_argument('--report_mode', type=str, default='async',
+                       choices=['sync', 'async', 'data'],
+                       help='Gerar gráficos no processo principal, em um processo separado '
+                            'ou só salvar os dados brutos (python -m src.reporting gera depois)')
+    
     args = parser.parse_args()
+    if args.skip_fraction > 0 and not args.loss_sampling:
+        parser.error('--skip_fraction requer --loss_sampling')
+    if args.val_subset_size and args.dataset == 'Shards':
+        # O subconjunto estratificado precisa de acesso por índice e de `targets`
+        parser.error('--val_subset_size não é suportado com --dataset Shards')
     main(args)
\ No newline at end of file
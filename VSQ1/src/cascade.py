@@ -0,0 +1,176 @@
+import time
+import argparse
+import torch
+import torch.nn.functional as F
+from src.data_loader import load_dataset
+from src.models import load_checkpoint
+from src.evaluate import classification_metrics, print_metrics
+
+CONFIDENCE_CRITERIA = ('margin', 'entropy')
+
+
+def confidence_scores(probs, criterion='margin'):
+    """Confiança de cada predição; valores maiores indicam predição mais segura"""
+    if criterion == 'margin':
+        top2 = probs.topk(2, dim=1).values
+        return top2[:, 0] - top2[:, 1]
+    if criterion == 'entropy':
+        # Entropia negativa: 0 para uma predição com certeza total
+        return (probs * probs.clamp_min(1e-12).log()).sum(dim=1)
+    raise ValueError(f"Critério de confiança não suportado: {criterion}")
+
+
+def collect_probabilities(model, loader, device='cuda'):
+    from tqdm import tqdm
+
+    model.eval()
+    model = model.to(device)
+
+    all_probs, all_labels = [], []
+    with torch.no_grad():
+        for inputs, labels in tqdm(loader, desc='Coletando probabilidades'):
+            outputs = model(inputs.to(device))
+            all_probs.append(F.softmax(outputs, dim=1).cpu())
+            all_labels.append(labels)
+
+    return torch.cat(all_probs), torch.cat(all_labels)
+
+
+def calibrate_threshold(small_probs, large_probs, labels, target_accuracy, criterion='margin'):
+    """Menor limiar (menos amostras escalonadas) cuja acurácia da cascata atinge o alvo"""
+    confidence = confidence_scores(small_probs, criterion)
+    small_correct = (small_probs.argmax(dim=1) == labels).float()
+    large_correct = (large_probs.argmax(dim=1) == labels).float()
+    n = len(labels)
+
+    # Escalonar as k amostras menos confiantes troca o acerto do pequeno pelo do grande
+    order = confidence.argsort()
+    sorted_confidence = confidence[order]
+    gain = (large_correct - small_correct)[order]
+    accuracy = (small_correct.sum() + torch.cat([torch.zeros(1), gain.cumsum(0)])) / n
+
+    # Só é possível separar em k se a k-ésima confiança for estritamente maior que a anterior
+    valid = torch.ones(n + 1, dtype=torch.bool)
+    valid[1:n] = sorted_confidence[1:] > sorted_confidence[:-1]
+
+    reached = valid & (accuracy >= target_accuracy)
+    if reached.any():
+        k = int(reached.nonzero()[0])
+    else:
+        k = int(torch.where(valid, accuracy, torch.full_like(accuracy, -1)).argmax())
+        print(f"⚠ Acurácia alvo {target_accuracy:.4f} inatingível; "
+              f"usando a máxima da cascata ({accuracy[k]:.4f})")
+
+    # Amostras com confiança abaixo do limiar vão para o modelo grande
+    threshold = float(sorted_confidence[k]) if k < n else float('inf')
+
+    return {
+        'threshold': threshold,
+        'expected_accuracy': float(accuracy[k]),
+        'escalation_rate': k / n,
+        'small_accuracy': float(small_correct.mean()),
+        'large_accuracy': float(large_correct.mean())
+    }
+
+
+def evaluate_cascade(small_model, large_model, test_loader, threshold, criterion='margin',
+                     device='cuda'):
+    """Avalia a cascata medindo a latência real: o modelo grande só roda nas amostras escalonadas"""
+    from tqdm import tqdm
+
+    small_model = small_model.to(device).eval()
+    large_model = large_model.to(device).eval()
+
+    all_preds, all_labels = [], []
+    total_time = 0
+    escalated = 0
+
+    with torch.no_grad():
+        for inputs, labels in tqdm(test_loader, desc='Avaliando cascata'):
+            inputs = inputs.to(device)
+
+            start_time = time.time()
+            probs = F.softmax(small_model(inputs), dim=1)
+            preds = probs.argmax(dim=1)
+            mask = confidence_scores(probs, criterion) < threshold
+            if mask.any():
+                preds[mask] = large_model(inputs[mask]).argmax(dim=1)
+            total_time += time.time() - start_time
+
+            escalated += int(mask.sum())
+            all_preds.append(preds.cpu())
+            all_labels.append(labels)
+
+    num_samples = len(test_loader.dataset)
+    metrics = classification_metrics(torch.cat(all_labels).numpy(), torch.cat(all_preds).numpy())
+    metrics.update({
+        'total_inference_time': total_time,
+        'avg_inference_time': total_time / num_samples,
+        'samples_per_second': num_samples / total_time,
+        'escalation_rate': escalated / num_samples,
+        'cascade_threshold': threshold
+    })
+
+    return metrics
+
+
+def run_cascade(small_model, large_model, test_loader, target_accuracy=None, criterion='margin',
+                device='cuda'):
+    """Calibra o limiar no test_loader e avalia a cascata com ele
+
+    Sem target_accuracy, o alvo é a acurácia do modelo grande sozinho.
+    """
+    small_probs, labels = collect_probabilities(small_model, test_loader, device)
+    large_probs, _ = collect_probabilities(large_model, test_loader, device)
+
+    if target_accuracy is None:
+        target_accuracy = float((large_probs.argmax(dim=1) == labels).float().mean())
+
+    calibration = calibrate_threshold(small_probs, large_probs, labels, target_accuracy, criterion)
+    print(f"\nCalibração ({criterion}): alvo {target_accuracy:.4f} | "
+          f"limiar {calibration['threshold']:.4f} | "
+          f"acurácia esperada {calibration['expected_accuracy']:.4f} | "
+          f"escalonados {calibration['escalation_rate']*100:.1f}%")
+
+    return evaluate_cascade(small_model, large_model, test_loader, calibration['threshold'],
+                            criterion=criterion, device=device)
+
+
+def cascade_name(small_name, large_name):
+    return f'cascade_{small_name}_{large_name}'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Calibra e avalia uma cascata de dois modelos treinados')
+
+    parser.add_argument('--small', type=str, required=True,
+                       help='Modelo barato, executado em todas as amostras')
+    parser.add_argument('--large', type=str, required=True,
+                       help='Modelo maior, executado só nas amostras pouco confiantes')
+    parser.add_argument('--dataset', type=str, default='CIFAR10',
+                       choices=['MNIST', 'CIFAR10', 'FashionMNIST', 'Shards'])
+    parser.add_argument('--data_dir', type=str, default='./data')
+    parser.add_argument('--batch_size', type=int, default=32)
+    parser.add_argument('--input_size', type=int, default=224)
+    parser.add_argument('--target_accuracy', type=float, default=None,
+                       help='Acurácia alvo da cascata (padrão: a do modelo grande)')
+    parser.add_argument('--criterion', type=str, default='margin', choices=CONFIDENCE_CRITERIA,
+                       help='Medida de confiança do modelo barato')
+
+    args = parser.parse_args()
+
+    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    _, test_loader, num_classes = load_dataset(dataset_name=args.dataset, data_dir=args.data_dir,
+                                               batch_size=args.batch_size,
+                                               input_size=args.input_size)
+
+    small_model, large_model = (
+        load_checkpoint(name, f'models/best_models/{name}_{args.dataset}.pth',
+                        num_classes=num_classes, device=device)
+        for name in (args.small, args.large)
+    )
+
+    metrics = run_cascade(small_model, large_model, test_loader,
+                          target_accuracy=args.target_accuracy, criterion=args.criterion,
+                          device=device)
+    print_metrics(metrics, cascade_name(args.small, args.large), args.dataset)
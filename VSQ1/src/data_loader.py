@@ -1,7 +1,28 @@
 import torch
-from torch.utils.data import DataLoader
+from torch.utils.data import DataLoader, Subset, IterableDataset
 from torchvision import datasets, transforms
+import numpy as np
 import os
+import json
+from src.shards import ShardedDataset, INDEX_FILE
+
+CLASS_NAMES = {
+    'CIFAR10': ['airplane', 'automobile', 'bird', 'cat', 'deer', 
+               'dog', 'frog', 'horse', 'ship', 'truck'],
+    'MNIST': [str(i) for i in range(10)],
+    'FashionMNIST': ['T-shirt', 'Trouser', 'Pullover', 'Dress', 'Coat',
+                    'Sandal', 'Shirt', 'Sneaker', 'Bag', 'Ankle boot']
+}
+
+def get_class_names(dataset_name, data_dir='./data'):
+    # Shards guardam as classes no index.json gerado por `python -m src.shards`
+    if dataset_name == 'Shards':
+        with open(os.path.join(data_dir, 'train', INDEX_FILE)) as f:
+            return json.load(f)['classes']
+    if dataset_name not in CLASS_NAMES:
+        raise ValueError(f"Dataset {dataset_name} não suportado")
+    return CLASS_NAMES[dataset_name]
+
 
 def get_data_transforms(dataset_name, input_size=224):
     
@@ -73,12 +94,21 @@ def load_dataset(dataset_name='CIFAR10', data_dir='./data', batch_size=32, input
                                        download=True, transform=test_transform)
         num_classes = 10
     
+    elif dataset_name == 'Shards':
+        # data_dir/train e data_dir/test gerados com `python -m src.shards`
+        train_dataset = ShardedDataset(os.path.join(data_dir, 'train'),
+                                       transform=train_transform, shuffle=True)
+        test_dataset = ShardedDataset(os.path.join(data_dir, 'test'),
+                                      transform=test_transform, shuffle=False)
+        num_classes = len(train_dataset.classes)
+    
     else:
         raise ValueError(f"Dataset {dataset_name} não suportado")
     
-   
+    # Datasets em stream embaralham por conta própria
+    shuffle_train = not isinstance(train_dataset, IterableDataset)
     train_loader = DataLoader(train_dataset, batch_size=batch_size, 
-                            shuffle=True, num_workers=2, pin_memory=True)
+                            shuffle=shuffle_train, num_workers=2, pin_memory=True)
     test_loader = DataLoader(test_dataset, batch_size=batch_size, 
                            shuffle=False, num_workers=2, pin_memory=True)
     
@@ -90,4 +120,29 @@ def load_dataset(dataset_name='CIFAR10', data_dir='./data', batch_size=32, input
     print(f"Batch size: {batch_size}")
     print(f"{'='*60}\n")
     
-    return train_loader, test_loader, num_classes
\ No newline at end of file
+    return train_loader, test_loader, num_classes
+
+
+def get_stratified_subset_loader(loader, subset_size, seed=0):
+    
+    dataset = loader.dataset
+    if not hasattr(dataset, 'targets'):
+        raise ValueError("Subconjunto estratificado requer um dataset com atributo 'targets'")
+    
+    targets = np.asarray(dataset.targets)
+    classes = np.unique(targets)
+    subset_size = min(subset_size, len(targets))
+    rng = np.random.default_rng(seed)
+    
+    # Amostra proporcional por classe, mantendo a distribuição original
+    indices = []
+    for cls in classes:
+        cls_indices = np.flatnonzero(targets == cls)
+        n_cls = max(1, round(subset_size * len(cls_indices) / len(targets)))
+        indices.extend(rng.choice(cls_indices, size=min(n_cls, len(cls_indices)), replace=False))
+    
+    indices = sorted(int(i) for i in indices)
+    
+    return DataLoader(Subset(dataset, indices), batch_size=loader.batch_size,
+                      shuffle=False, num_workers=loader.num_workers,
+                      pin_memory=loader.pin_memory)
@@ -1,13 +1,33 @@
 import torch
+import torch.nn as nn
 import numpy as np
-from sklearn.metrics import (accuracy_score, precision_score, recall_score, 
-                            f1_score, confusion_matrix, classification_report)
-from tqdm import tqdm
 import time
-from torchinfo import summary
-from ptflops import get_model_complexity_info
+import io
+import copy
+import sys
+import multiprocessing as mp
+from itertools import chain
+from queue import Empty
+
+# sklearn, tqdm, torchinfo e ptflops são importados dentro das funções que os usam
+# para não pesar na inicialização de jobs que só precisam de parte do módulo
+
+def classification_metrics(all_labels, all_preds):
+    from sklearn.metrics import (accuracy_score, precision_score, recall_score, 
+                                f1_score, confusion_matrix, classification_report)
+    
+    return {
+        'accuracy': accuracy_score(all_labels, all_preds),
+        'precision': precision_score(all_labels, all_preds, average='weighted', zero_division=0),
+        'recall': recall_score(all_labels, all_preds, average='weighted', zero_division=0),
+        'f1_score': f1_score(all_labels, all_preds, average='weighted', zero_division=0),
+        'confusion_matrix': confusion_matrix(all_labels, all_preds),
+        'classification_report': classification_report(all_labels, all_preds, zero_division=0)
+    }
+
 
 def evaluate_model(model, test_loader, device='cuda'):
+    from tqdm import tqdm
   
     model.eval()
     model = model.to(device)
@@ -34,26 +54,19 @@ def evaluate_model(model, test_loader, device='cuda'):
     all_labels = np.array(all_labels)
     
     
-    metrics = {
-        'accuracy': accuracy_score(all_labels, all_preds),
-        'precision': precision_score(all_labels, all_preds, average='weighted', zero_division=0),
-        'recall': recall_score(all_labels, all_preds, average='weighted', zero_division=0),
-        'f1_score': f1_score(all_labels, all_preds, average='weighted', zero_division=0),
-        'confusion_matrix': confusion_matrix(all_labels, all_preds),
+    metrics = classification_metrics(all_labels, all_preds)
+    metrics.update({
         'total_inference_time': total_time,
         'avg_inference_time': total_time / len(test_loader.dataset),
         'samples_per_second': len(test_loader.dataset) / total_time
-    }
-    
-   
-    metrics['classification_report'] = classification_report(
-        all_labels, all_preds, zero_division=0
-    )
+    })
     
     return metrics
 
 
 def get_model_complexity(model, input_size=(3, 224, 224), device='cuda'):
+    from torchinfo import summary
+    from ptflops import get_model_complexity_info
   
     model = model.to(device)
     
@@ -75,7 +88,7 @@ def get_model_complexity(model, input_size=(3, 224, 224), device='cuda'):
     complexity = {
         'total_params': model_stats.total_params,
         'trainable_params': model_stats.trainable_params,
-        'model_size_mb': model_stats.total_params * 4 / (1024 ** 2),  # Float32
+        'model_size_mb': _tensor_bytes(model) / (1024 ** 2),
         'flops': flops,
         'macs': macs
     }
@@ -83,6 +96,169 @@ def get_model_complexity(model, input_size=(3, 224, 224), device='cuda'):
     return complexity
 
 
+def _tensor_bytes(model):
+    # Parâmetros e buffers com o tamanho real de cada dtype
+    return sum(t.numel() * t.element_size()
+               for t in chain(model.parameters(), model.buffers()))
+
+
+def _serialized_size_mb(model):
+    
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.getbuffer().nbytes / (1024 ** 2)
+
+
+def _peak_rss_mb():
+    
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss é em bytes no macOS e em KB no Linux
+    return peak / (1024 ** 2) if sys.platform == 'darwin' else peak / 1024
+
+
+def _activation_memory(model, batch_size, input_size, device):
+    
+    layers = []
+    
+    def make_hook(name):
+        def hook(module, inputs, output):
+            outputs = output if isinstance(output, (tuple, list)) else [output]
+            size = sum(o.numel() * o.element_size() for o in outputs if torch.is_tensor(o))
+            layers.append((name, size / (1024 ** 2)))
+        return hook
+    
+    handles = []
+    for name, module in model.named_modules():
+        if len(list(module.children())) == 0:
+            handles.append(module.register_forward_hook(make_hook(name)))
+    
+    model.eval()
+    try:
+        with torch.no_grad():
+            model(torch.randn(batch_size, *input_size, device=device))
+    finally:
+        for handle in handles:
+            handle.remove()
+    
+    return layers
+
+
+def _memory_probe(model, batch_size, input_size, device, queue):
+    # Executado em um processo separado para que o pico de RSS seja só deste modelo
+    try:
+        queue.put(_measure_peak_memory(model, batch_size, input_size, device))
+    except Exception as e:
+        # Sem isso o processo principal esperaria na fila para sempre
+        queue.put({'error': f"{type(e).__name__}: {e}"})
+
+
+def _measure_peak_memory(model, batch_size, input_size, device):
+    
+    use_cuda = torch.device(device).type == 'cuda'
+    model = model.to(device)
+    inputs = torch.randn(batch_size, *input_size, device=device)
+    result = {'baseline_rss_mb': _peak_rss_mb()}
+    
+    if use_cuda:
+        torch.cuda.reset_peak_memory_stats()
+    model.eval()
+    with torch.no_grad():
+        model(inputs)
+    result['peak_rss_inference_mb'] = _peak_rss_mb()
+    if use_cuda:
+        result['peak_cuda_inference_mb'] = torch.cuda.max_memory_allocated() / (1024 ** 2)
+        torch.cuda.reset_peak_memory_stats()
+    
+    model.train()
+    trainable = [p for p in model.parameters() if p.requires_grad]
+    optimizer = torch.optim.Adam(trainable) if trainable else None
+    outputs = model(inputs)
+    loss = nn.functional.cross_entropy(outputs, torch.zeros(batch_size, dtype=torch.long,
+                                                           device=device))
+    if optimizer is not None:
+        loss.backward()
+        optimizer.step()
+    result['peak_rss_train_mb'] = _peak_rss_mb()
+    if use_cuda:
+        result['peak_cuda_train_mb'] = torch.cuda.max_memory_allocated() / (1024 ** 2)
+    
+    return result
+
+
+def _wait_probe(process, queue, poll_seconds=5):
+    # O filho pode morrer sem escrever na fila (ex.: OOM killer); não bloquear para sempre
+    while True:
+        try:
+            result = queue.get(timeout=poll_seconds)
+            break
+        except Empty:
+            if not process.is_alive():
+                try:
+                    result = queue.get(timeout=1)
+                except Empty:
+                    result = {'error': f"processo de medição terminou com código {process.exitcode}"}
+                break
+    
+    process.join()
+    return result
+
+
+def _unavailable_memory(use_cuda):
+    
+    keys = ['baseline_rss_mb', 'peak_rss_inference_mb', 'peak_rss_train_mb']
+    if use_cuda:
+        keys += ['peak_cuda_inference_mb', 'peak_cuda_train_mb']
+    return dict.fromkeys(keys)
+
+
+def get_memory_footprint(model, input_size=(3, 224, 224), batch_sizes=(1,), device='cuda'):
+    
+    model = model.to(device)
+    use_cuda = torch.device(device).type == 'cuda'
+    cpu_model = copy.deepcopy(model).cpu()
+    ctx = mp.get_context('spawn')
+    
+    footprint = {
+        'serialized_size_mb': _serialized_size_mb(model),
+        'memory': {}
+    }
+    
+    for batch_size in batch_sizes:
+        print(f"Medindo memória com batch size {batch_size}...")
+        try:
+            layers = _activation_memory(model, batch_size, input_size, device)
+        except RuntimeError as e:
+            print(f"⚠ Ativações com batch size {batch_size} não medidas: {e}")
+            layers = None
+            if use_cuda:
+                torch.cuda.empty_cache()
+        
+        queue = ctx.Queue()
+        process = ctx.Process(target=_memory_probe,
+                              args=(cpu_model, batch_size, input_size, str(device), queue))
+        process.start()
+        result = _wait_probe(process, queue)
+        
+        # Falha (ex.: OOM) vira medição indisponível ("n/d") em vez de interromper o treino
+        if 'error' in result:
+            print(f"⚠ Pico de memória com batch size {batch_size} não medido: {result['error']}")
+            result = _unavailable_memory(use_cuda)
+        
+        result['activation_mb'] = sum(size for _, size in layers) if layers is not None else None
+        result['activation_per_layer'] = layers or []
+        footprint['memory'][batch_size] = result
+    
+    return footprint
+
+
+def _format_mb(value):
+    return f"{value:.1f} MB" if value is not None else "n/d"
+
+
 def print_metrics(metrics, model_name, dataset_name):
     """Imprime métricas formatadas"""
     print(f"\n{'='*70}")
@@ -99,6 +275,9 @@ def print_metrics(metrics, model_name, dataset_name):
     print(f"  Tempo total:           {metrics['total_inference_time']:.4f}s")
     print(f"  Tempo médio/imagem:    {metrics['avg_inference_time']*1000:.2f}ms")
     print(f"  Imagens por segundo:   {metrics['samples_per_second']:.2f}")
+    if 'escalation_rate' in metrics:
+        print(f"  Taxa de escalonamento: {metrics['escalation_rate']*100:.2f}% "
+              f"(limiar {metrics['cascade_threshold']:.4f})")
     
     if 'total_params' in metrics:
         print(f"\n Complexidade do Modelo:")
@@ -108,6 +287,14 @@ def print_metrics(metrics, model_name, dataset_name):
         if metrics.get('flops'):
             print(f"  FLOPs:                 {metrics['flops']/1e9:.2f} GFLOPs")
     
+    if 'memory' in metrics:
+        print(f"\n Memória:")
+        print(f"  Checkpoint serializado: {metrics['serialized_size_mb']:.2f} MB")
+        for batch_size, mem in metrics['memory'].items():
+            print(f"  Batch {batch_size:<4} pico RSS inferência: {_format_mb(mem['peak_rss_inference_mb'])} | "
+                  f"treino: {_format_mb(mem['peak_rss_train_mb'])} | "
+                  f"ativações: {_format_mb(mem['activation_mb'])}")
+    
     print(f"\n Relatório de Classificação:")
     print(metrics['classification_report'])
     print(f"{'='*70}\n")
@@ -119,7 +306,7 @@ def compare_models(results_dict):
     print("COMPARAÇÃO DE MODELOS")
     print(f"{'='*80}\n")
     
-    print(f"{'Modelo':<20} {'Acurácia':<12} {'F1-Score':<12} {'Tempo/img':<15} {'Params':<15}")
+    print(f"{'Modelo':<20} {'Acurácia':<12} {'F1-Score':<12} {'Tempo/img':<15} {'Params':<15} {'Escalonados':<12}")
     print(f"{'-'*80}")
     
     for model_name, metrics in results_dict.items():
@@ -127,7 +314,9 @@ def compare_models(results_dict):
         f1 = f"{metrics['f1_score']:.4f}"
         time_per_img = f"{metrics['avg_inference_time']*1000:.2f}ms"
         params = f"{metrics.get('total_params', 0)/1e6:.2f}M"
+        escalated = (f"{metrics['escalation_rate']*100:.1f}%"
+                     if 'escalation_rate' in metrics else '-')
         
-        print(f"{model_name:<20} {acc:<12} {f1:<12} {time_per_img:<15} {params:<15}")
+        print(f"{model_name:<20} {acc:<12} {f1:<12} {time_per_img:<15} {params:<15} {escalated:<12}")
     
     print(f"{'-'*80}\n")
\ No newline at end of file
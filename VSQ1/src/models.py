@@ -1,35 +1,77 @@
 import torch
 import torch.nn as nn
 from torchvision import models
+import os
 
-def get_model(model_name='resnet18', num_classes=10, pretrained=True):
+def _build_architecture(model_name, pretrained=True):
     
+    weights = 'IMAGENET1K_V1' if pretrained else None
+    
+    if model_name == 'alexnet':
+        return models.alexnet(weights=weights)
+    elif model_name == 'resnet18':
+        return models.resnet18(weights=weights)
+    elif model_name == 'resnet50':
+        return models.resnet50(weights=weights)
+    elif model_name == 'mobilenet_v2':
+        return models.mobilenet_v2(weights=weights)
+    else:
+        raise ValueError(f"Modelo {model_name} não suportado")
+
+
+def _replace_head(model, model_name, num_classes):
     
     if model_name == 'alexnet':
-        model = models.alexnet(weights='IMAGENET1K_V1' if pretrained else None)
-        
         num_features = model.classifier[6].in_features
         model.classifier[6] = nn.Linear(num_features, num_classes)
         
-    elif model_name == 'resnet18':
-        model = models.resnet18(weights='IMAGENET1K_V1' if pretrained else None)
-        num_features = model.fc.in_features
-        model.fc = nn.Linear(num_features, num_classes)
-        
-    elif model_name == 'resnet50':
-        model = models.resnet50(weights='IMAGENET1K_V1' if pretrained else None)
+    elif 'resnet' in model_name:
         num_features = model.fc.in_features
         model.fc = nn.Linear(num_features, num_classes)
         
     elif model_name == 'mobilenet_v2':
-        model = models.mobilenet_v2(weights='IMAGENET1K_V1' if pretrained else None)
         num_features = model.classifier[1].in_features
         model.classifier[1] = nn.Linear(num_features, num_classes)
+    
+    return model
+
+
+def _load_state_dict_mmap(model, path):
+    # Pesos mapeados em memória e atribuídos direto aos módulos criados no device meta,
+    # sem inicialização aleatória nem cópia
+    state_dict = torch.load(path, map_location='cpu', mmap=True, weights_only=True)
+    model.load_state_dict(state_dict, assign=True)
+    return model
+
+
+def get_model(model_name='resnet18', num_classes=10, pretrained=True, weight_store=None):
+    
+    if pretrained and weight_store is not None:
+        path = os.path.join(weight_store, f'{model_name}_imagenet.pth')
         
+        if os.path.exists(path):
+            with torch.device('meta'):
+                model = _build_architecture(model_name, pretrained=False)
+            _load_state_dict_mmap(model, path)
+        else:
+            model = _build_architecture(model_name, pretrained=True)
+            os.makedirs(weight_store, exist_ok=True)
+            torch.save(model.state_dict(), path)
+            print(f"✓ Pesos de {model_name} copiados para: {path}")
     else:
-        raise ValueError(f"Modelo {model_name} não suportado")
+        model = _build_architecture(model_name, pretrained)
     
-    return model
+    return _replace_head(model, model_name, num_classes)
+
+
+def load_checkpoint(model_name, checkpoint_path, num_classes=10, device='cpu'):
+    
+    with torch.device('meta'):
+        model = _replace_head(_build_architecture(model_name, pretrained=False),
+                              model_name, num_classes)
+    _load_state_dict_mmap(model, checkpoint_path)
+    
+    return model.to(device).eval()
 
 
 def count_parameters(model):
@@ -0,0 +1,290 @@
+import os
+import csv
+import json
+import queue
+import argparse
+import threading
+import time
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+import torch
+from PIL import Image
+from src.data_loader import get_data_transforms, get_class_names
+from src.models import load_checkpoint
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.gif', '.tif', '.tiff', '.webp')
+
+
+def iter_image_paths(source):
+    # Ordem determinística para que o offset salvo continue válido ao retomar
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for filename in sorted(files):
+                if filename.lower().endswith(IMAGE_EXTENSIONS):
+                    yield os.path.join(root, filename)
+    else:
+        with open(source) as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield line
+
+
+def _progress_path(output):
+    return f'{output}.progress.json'
+
+
+def _read_progress(output):
+
+    path = _progress_path(output)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_progress(output, progress):
+    # Escrita atômica: o arquivo de progresso nunca fica pela metade
+    tmp_path = _progress_path(output) + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(progress, f)
+    os.replace(tmp_path, _progress_path(output))
+
+
+class CsvOutput:
+
+    def __init__(self, path, fieldnames, resume=False):
+        self.path = path
+        progress = _read_progress(path) if resume else None
+
+        if progress is not None:
+            # Descarta linhas escritas depois do último progresso salvo
+            with open(path, 'r+b') as f:
+                f.truncate(progress['bytes'])
+            self.offset = progress['offset']
+            self.file = open(path, 'a', newline='')
+            self.writer = csv.DictWriter(self.file, fieldnames=fieldnames)
+        else:
+            self.offset = 0
+            self.file = open(path, 'w', newline='')
+            self.writer = csv.DictWriter(self.file, fieldnames=fieldnames)
+            self.writer.writeheader()
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+        self.file.flush()
+        self.offset += len(rows)
+        _write_progress(self.path, {'offset': self.offset, 'bytes': self.file.tell()})
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetOutput:
+
+    def __init__(self, path, fieldnames, resume=False, rows_per_part=50000):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Saída em Parquet requer o pacote pyarrow (pip install pyarrow)")
+        self.pa, self.pq = pa, pq
+
+        self.path = path
+        self.fieldnames = fieldnames
+        self.rows_per_part = rows_per_part
+        self.rows = []
+        os.makedirs(path, exist_ok=True)
+
+        progress = _read_progress(path) if resume else None
+        self.offset = progress['offset'] if progress is not None else 0
+
+        # Remove partes escritas depois do último progresso salvo
+        for filename in os.listdir(path):
+            if filename.startswith('part-') and int(filename[5:17]) >= self.offset:
+                os.remove(os.path.join(path, filename))
+
+    def _flush(self):
+        if not self.rows:
+            return
+        table = self.pa.Table.from_pylist(self.rows)
+        part = os.path.join(self.path, f'part-{self.offset:012d}.parquet')
+        self.pq.write_table(table, part)
+        self.offset += len(self.rows)
+        self.rows = []
+        _write_progress(self.path, {'offset': self.offset})
+
+    def write(self, rows):
+        self.rows.extend(rows)
+        if len(self.rows) >= self.rows_per_part:
+            self._flush()
+
+    def close(self):
+        self._flush()
+
+
+def _decode(path, transform):
+    try:
+        with Image.open(path) as image:
+            return transform(image.convert('RGB')), None
+    except Exception as e:
+        return None, str(e)
+
+
+def _prefetch(paths, transform, executor, prefetch_queue):
+    # Fila limitada: no máximo `maxsize` imagens decodificadas em memória
+    try:
+        for path in paths:
+            prefetch_queue.put((path, executor.submit(_decode, path, transform)))
+    except Exception as e:
+        # Repassa o erro ao consumidor em vez de morrer em silêncio
+        prefetch_queue.put(e)
+    finally:
+        prefetch_queue.put(None)
+
+
+def _iter_batches(prefetch_queue, batch_size):
+
+    batch = []
+    while True:
+        item = prefetch_queue.get()
+        if item is None:
+            break
+        if isinstance(item, Exception):
+            raise item
+        path, future = item
+        batch.append((path, *future.result()))
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def predict_directory(model, source, output, class_names, transform, device='cpu',
+                      batch_size=64, decode_workers=8, prefetch_batches=4, top_k=5,
+                      output_format='csv', resume=False):
+
+    if not os.path.exists(source):
+        raise FileNotFoundError(f"Fonte de imagens não encontrada: {source}")
+
+    top_k = min(top_k, len(class_names))
+    fieldnames = ['path', 'label', 'class_id']
+    for k in range(1, top_k + 1):
+        fieldnames += [f'top{k}_label', f'top{k}_prob']
+    fieldnames.append('error')
+
+    if output_format == 'csv':
+        writer = CsvOutput(output, fieldnames, resume=resume)
+    elif output_format == 'parquet':
+        writer = ParquetOutput(output, fieldnames, resume=resume)
+    else:
+        raise ValueError(f"Formato {output_format} não suportado")
+
+    if writer.offset:
+        print(f"Retomando a partir da imagem {writer.offset}")
+
+    paths = islice(iter_image_paths(source), writer.offset, None)
+    prefetch_queue = queue.Queue(maxsize=batch_size * prefetch_batches)
+    executor = ThreadPoolExecutor(max_workers=decode_workers)
+    producer = threading.Thread(target=_prefetch, daemon=True,
+                                args=(paths, transform, executor, prefetch_queue))
+    producer.start()
+
+    model = model.to(device).eval()
+    processed = 0
+    start = time.time()
+
+    try:
+        for batch_idx, batch in enumerate(_iter_batches(prefetch_queue, batch_size)):
+            valid = [tensor for _, tensor, _ in batch if tensor is not None]
+            if valid:
+                with torch.inference_mode():
+                    probs = torch.softmax(model(torch.stack(valid).to(device)), dim=1).cpu()
+                top_probs, top_ids = torch.topk(probs, top_k)
+
+            rows = []
+            valid_idx = 0
+            for path, tensor, error in batch:
+                row = dict.fromkeys(fieldnames)
+                row['path'] = path
+                if tensor is None:
+                    row['error'] = error
+                else:
+                    ids, ps = top_ids[valid_idx].tolist(), top_probs[valid_idx].tolist()
+                    valid_idx += 1
+                    row['class_id'] = ids[0]
+                    row['label'] = class_names[ids[0]]
+                    for k, (i, p) in enumerate(zip(ids, ps), start=1):
+                        row[f'top{k}_label'] = class_names[i]
+                        row[f'top{k}_prob'] = p
+                rows.append(row)
+
+            writer.write(rows)
+            processed += len(batch)
+            if batch_idx % 50 == 0:
+                elapsed = time.time() - start
+                print(f"  {writer.offset} imagens processadas "
+                      f"({processed / elapsed:.1f} imagens/s)")
+    finally:
+        writer.close()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    elapsed = time.time() - start
+    print(f"\n✓ {processed} imagens classificadas em {elapsed:.1f}s")
+    print(f"✓ Predições salvas em: {output}")
+
+    return processed
+
+
+def main(args):
+
+    device = torch.device(args.device or ('cuda' if torch.cuda.is_available() else 'cpu'))
+    class_names = get_class_names(args.dataset, args.data_dir)
+    _, test_transform = get_data_transforms(args.dataset, args.input_size)
+
+    checkpoint = args.checkpoint or f'models/best_models/{args.model}_{args.dataset}.pth'
+    print(f"Carregando {args.model} de {checkpoint}...")
+    model = load_checkpoint(args.model, checkpoint, num_classes=len(class_names), device=device)
+
+    predict_directory(model, args.source, args.output, class_names, test_transform,
+                      device=device, batch_size=args.batch_size,
+                      decode_workers=args.decode_workers, prefetch_batches=args.prefetch_batches,
+                      top_k=args.top_k, output_format=args.format, resume=args.resume)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Inferência em lote sobre diretórios de imagens')
+
+    parser.add_argument('--model', type=str, required=True,
+                       help='Arquitetura do checkpoint (alexnet,resnet18,resnet50,mobilenet_v2)')
+    parser.add_argument('--checkpoint', type=str, default=None,
+                       help='Checkpoint (padrão: models/best_models/<modelo>_<dataset>.pth)')
+    parser.add_argument('--dataset', type=str, default='CIFAR10',
+                       choices=['MNIST', 'CIFAR10', 'FashionMNIST', 'Shards'],
+                       help='Dataset usado no treino (define classes e transformações)')
+    parser.add_argument('--data_dir', type=str, default='./data',
+                       help='Com --dataset Shards, diretório cujo train/index.json define as classes')
+    parser.add_argument('--input_size', type=int, default=224,
+                       help='Tamanho da imagem de entrada')
+    parser.add_argument('--source', type=str, required=True,
+                       help='Diretório de imagens ou arquivo com um caminho por linha')
+    parser.add_argument('--output', type=str, required=True,
+                       help='Arquivo CSV ou diretório Parquet de saída')
+    parser.add_argument('--format', type=str, default='csv', choices=['csv', 'parquet'],
+                       help='Formato de saída')
+    parser.add_argument('--resume', action='store_true',
+                       help='Retomar a partir do último offset gravado')
+    parser.add_argument('--device', type=str, default=None,
+                       help='Device de inferência (padrão: cuda se disponível)')
+    parser.add_argument('--batch_size', type=int, default=64)
+    parser.add_argument('--decode_workers', type=int, default=8,
+                       help='Threads para decodificar e redimensionar as imagens')
+    parser.add_argument('--prefetch_batches', type=int, default=4,
+                       help='Batches decodificados mantidos à frente do modelo')
+    parser.add_argument('--top_k', type=int, default=5,
+                       help='Número de classes mais prováveis por imagem')
+
+    args = parser.parse_args()
+    main(args)
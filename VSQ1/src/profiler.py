@@ -0,0 +1,121 @@
+import os
+import time
+import torch
+
+
+class TrainingProfiler:
+    """Mede o tempo de cada etapa do passo de treino e, opcionalmente, captura um trace do torch.profiler"""
+
+    STAGES = ('data_wait', 'h2d', 'forward', 'backward', 'optimizer')
+
+    def __init__(self, enabled=True, device='cpu', trace_steps=None,
+                 trace_name='train', save_dir='results/profiler'):
+        self.enabled = enabled
+        self.sync = torch.device(device).type == 'cuda'
+        self.trace_steps = trace_steps
+        self.trace_name = trace_name
+        self.save_dir = save_dir
+        self.global_step = 0
+        self._torch_prof = None
+
+    def _now(self):
+        # Sincroniza a GPU para que o tempo seja atribuído à etapa correta
+        if self.sync:
+            torch.cuda.synchronize()
+        return time.perf_counter()
+
+    def start_epoch(self):
+        if not self.enabled:
+            return
+        self._totals = dict.fromkeys(self.STAGES, 0.0)
+        self._steps = 0
+        self._samples = 0
+        self._epoch_start = self._last = self._now()
+
+    def step_start(self):
+        if not self.enabled:
+            return
+        if self.trace_steps is not None and self.global_step == self.trace_steps[0]:
+            self._start_trace()
+        now = self._now()
+        self._totals['data_wait'] += now - self._last
+        self._last = now
+
+    def mark(self, stage):
+        if not self.enabled:
+            return
+        now = self._now()
+        self._totals[stage] += now - self._last
+        self._last = now
+
+    def step_end(self, batch_size):
+        if not self.enabled:
+            return
+        self._steps += 1
+        self._samples += batch_size
+        self.global_step += 1
+        if self._torch_prof is not None:
+            self._torch_prof.step()
+            if self.global_step >= self.trace_steps[1]:
+                self._stop_trace()
+        self._last = self._now()
+
+    def end_epoch(self):
+        if not self.enabled:
+            return None
+
+        total = self._now() - self._epoch_start
+        compute = sum(self._totals[s] for s in self.STAGES if s != 'data_wait')
+
+        summary = {
+            'steps': self._steps,
+            'total_time': total,
+            'samples_per_second': self._samples / total if total > 0 else 0.0,
+            'bound': 'input' if self._totals['data_wait'] > compute else 'compute'
+        }
+        for stage in self.STAGES:
+            summary[f'{stage}_time'] = self._totals[stage]
+            summary[f'{stage}_frac'] = self._totals[stage] / total if total > 0 else 0.0
+
+        return summary
+
+    def close(self):
+        if self._torch_prof is not None:
+            self._stop_trace()
+
+    def _start_trace(self):
+        activities = [torch.profiler.ProfilerActivity.CPU]
+        if self.sync:
+            activities.append(torch.profiler.ProfilerActivity.CUDA)
+        self._torch_prof = torch.profiler.profile(activities=activities, record_shapes=True)
+        self._torch_prof.__enter__()
+        print(f'\nCapturando trace do torch.profiler a partir do passo {self.global_step}')
+
+    def _stop_trace(self):
+        prof = self._torch_prof
+        self._torch_prof = None
+        prof.__exit__(None, None, None)
+
+        os.makedirs(self.save_dir, exist_ok=True)
+        trace_path = f'{self.save_dir}/{self.trace_name}_trace.json'
+        table_path = f'{self.save_dir}/{self.trace_name}_top_ops.txt'
+
+        prof.export_chrome_trace(trace_path)
+        sort_by = 'self_cuda_time_total' if self.sync else 'self_cpu_time_total'
+        table = prof.key_averages().table(sort_by=sort_by, row_limit=25)
+        with open(table_path, 'w') as f:
+            f.write(table)
+
+        print(f'\n✓ Trace salvo em: {trace_path}')
+        print(f'✓ Top operações salvas em: {table_path}')
+
+
+def print_profile_summary(summary):
+    """Imprime o resumo de tempo por etapa de uma época"""
+    print(f'\n Perfil da época ({summary["steps"]} passos, '
+          f'{summary["samples_per_second"]:.1f} amostras/s):')
+    for stage in TrainingProfiler.STAGES:
+        print(f'  {stage:<10} {summary[f"{stage}_time"]:8.2f}s '
+              f'({summary[f"{stage}_frac"]*100:5.1f}%)')
+    bound = 'entrada de dados' if summary['bound'] == 'input' else 'computação'
+    print(f'  Gargalo: {bound}')
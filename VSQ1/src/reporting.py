@@ -0,0 +1,156 @@
+import os
+import json
+import argparse
+import traceback
+import multiprocessing as mp
+import numpy as np
+
+# Funções de visualize.py que geram figuras; as demais (CSV) são dados brutos
+FIGURE_JOBS = {'plot_training_history', 'plot_confusion_matrix',
+               'plot_metrics_comparison', 'plot_efficiency_comparison'}
+
+
+def _run_job(name, args, kwargs, raise_errors=False):
+
+    import matplotlib
+    matplotlib.use('Agg')
+    from src import visualize
+
+    try:
+        getattr(visualize, name)(*args, **kwargs)
+    except Exception:
+        if raise_errors:
+            raise
+        print(f"Erro ao gerar relatório '{name}':")
+        traceback.print_exc()
+        return False
+    return True
+
+
+def _worker_loop(queue, failures):
+
+    for name, args, kwargs in iter(queue.get, None):
+        if not _run_job(name, args, kwargs):
+            failures.put(name)
+
+
+def _to_serializable(value, arrays):
+    # Arrays vão para o NPZ e ficam referenciados no JSON
+    if isinstance(value, np.ndarray):
+        key = f'arr_{len(arrays)}'
+        arrays[key] = value
+        return {'__npz__': key}
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, dict):
+        return {'__dict__': [[_to_serializable(k, arrays), _to_serializable(v, arrays)]
+                             for k, v in value.items()]}
+    if isinstance(value, (list, tuple)):
+        return [_to_serializable(v, arrays) for v in value]
+    return value
+
+
+def _from_serializable(value, arrays):
+
+    if isinstance(value, dict):
+        if '__npz__' in value:
+            return arrays[value['__npz__']]
+        return {_from_serializable(k, arrays): _from_serializable(v, arrays)
+                for k, v in value['__dict__']}
+    if isinstance(value, list):
+        return [_from_serializable(v, arrays) for v in value]
+    return value
+
+
+class Reporter:
+    """Gera gráficos e CSVs de forma síncrona, em um processo separado ou só salva os dados brutos"""
+
+    def __init__(self, mode='async', raw_dir='results/raw'):
+        if mode not in ('sync', 'async', 'data'):
+            raise ValueError(f"Modo de relatório {mode} não suportado")
+
+        self.mode = mode
+        self.raw_dir = raw_dir
+        self._num_jobs = 0
+        self._process = None
+
+        if mode == 'async':
+            ctx = mp.get_context('spawn')
+            self._queue = ctx.Queue()
+            self._failures = ctx.Queue()
+            self._process = ctx.Process(target=_worker_loop, args=(self._queue, self._failures),
+                                        daemon=True)
+            self._process.start()
+        elif mode == 'data':
+            os.makedirs(raw_dir, exist_ok=True)
+
+    def submit(self, name, *args, **kwargs):
+
+        if self.mode == 'async':
+            self._queue.put((name, args, kwargs))
+        elif self.mode == 'data' and name in FIGURE_JOBS:
+            self._save_job(name, args, kwargs)
+        else:
+            # No processo principal os erros se propagam, como antes do Reporter
+            _run_job(name, args, kwargs, raise_errors=True)
+
+    def _save_job(self, name, args, kwargs):
+
+        arrays = {}
+        job = {
+            'name': name,
+            'args': _to_serializable(list(args), arrays),
+            'kwargs': _to_serializable(kwargs, arrays)
+        }
+        prefix = f'{self.raw_dir}/{self._num_jobs:04d}_{name}'
+        self._num_jobs += 1
+
+        with open(f'{prefix}.json', 'w') as f:
+            json.dump(job, f)
+        if arrays:
+            np.savez_compressed(f'{prefix}.npz', **arrays)
+        print(f"✓ Dados de '{name}' salvos em: {prefix}.json")
+
+    def close(self):
+
+        if self._process is not None:
+            print("\nAguardando geração dos relatórios...")
+            self._queue.put(None)
+            self._process.join()
+
+            failed = []
+            while not self._failures.empty():
+                failed.append(self._failures.get())
+            if self._process.exitcode != 0:
+                print(f"⚠ Processo de relatórios terminou com código {self._process.exitcode}")
+            if failed:
+                print(f"⚠ {len(failed)} relatório(s) falharam: {', '.join(failed)}")
+            self._process = None
+
+
+def render_saved_reports(raw_dir='results/raw'):
+
+    for filename in sorted(os.listdir(raw_dir)):
+        if not filename.endswith('.json'):
+            continue
+
+        prefix = os.path.join(raw_dir, filename[:-len('.json')])
+        with open(f'{prefix}.json') as f:
+            job = json.load(f)
+
+        arrays = {}
+        if os.path.exists(f'{prefix}.npz'):
+            with np.load(f'{prefix}.npz') as npz:
+                arrays = dict(npz)
+
+        _run_job(job['name'], _from_serializable(job['args'], arrays),
+                 _from_serializable(job['kwargs'], arrays))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Gera os gráficos a partir dos dados brutos salvos')
+    parser.add_argument('raw_dir', type=str, nargs='?', default='results/raw',
+                       help='Diretório com os dados salvos por --report_mode data')
+
+    args = parser.parse_args()
+    render_saved_reports(args.raw_dir)
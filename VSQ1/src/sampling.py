@@ -0,0 +1,80 @@
+import math
+import numpy as np
+import torch
+from torch.utils.data import DataLoader, Dataset, WeightedRandomSampler
+
+
+class IndexedDataset(Dataset):
+    """Retorna também o índice de cada amostra, para rastrear a perda por amostra"""
+    def __init__(self, dataset):
+        self.dataset = dataset
+
+    def __len__(self):
+        return len(self.dataset)
+
+    def __getitem__(self, idx):
+        inputs, label = self.dataset[idx]
+        return inputs, label, idx
+
+
+class SampleLossTracker:
+    """Guarda a perda mais recente de cada amostra de treino em um array float16"""
+    def __init__(self, num_samples, smoothing=0.5, uniform_mix=0.2):
+        self.losses = np.zeros(num_samples, dtype=np.float16)
+        self.seen = np.zeros(num_samples, dtype=bool)
+        self.smoothing = smoothing
+        self.uniform_mix = uniform_mix
+
+    def update(self, indices, losses):
+        idx = indices.cpu().numpy()
+        new = losses.detach().float().cpu().numpy()
+        old = self.losses[idx].astype(np.float32)
+        smoothed = self.smoothing * old + (1 - self.smoothing) * new
+        self.losses[idx] = np.where(self.seen[idx], smoothed, new)
+        self.seen[idx] = True
+
+    def sampling_probs(self):
+        losses = self.losses.astype(np.float64)
+        n = len(losses)
+
+        # Amostras ainda não vistas recebem a maior perda conhecida
+        if self.seen.any():
+            losses[~self.seen] = losses[self.seen].max()
+        else:
+            losses[:] = 1.0
+
+        total = losses.sum()
+        probs = losses / total if total > 0 else np.full(n, 1.0 / n)
+
+        # Mistura com a distribuição uniforme para que nenhuma amostra tenha probabilidade zero
+        return (1 - self.uniform_mix) * probs + self.uniform_mix / n
+
+    def build_loader(self, train_loader, weighted=True):
+
+        dataset = IndexedDataset(train_loader.dataset)
+        n = len(dataset)
+
+        if weighted:
+            probs = self.sampling_probs()
+            sampler = WeightedRandomSampler(torch.as_tensor(probs), num_samples=n,
+                                            replacement=True)
+            # Pesos de importância 1/(N p_i) mantêm loss/acurácia reportadas sem viés
+            importance = (1.0 / (n * probs)).astype(np.float32)
+            loader = DataLoader(dataset, batch_size=train_loader.batch_size,
+                                sampler=sampler, num_workers=train_loader.num_workers,
+                                pin_memory=train_loader.pin_memory)
+        else:
+            importance = np.ones(n, dtype=np.float32)
+            loader = DataLoader(dataset, batch_size=train_loader.batch_size,
+                                shuffle=True, num_workers=train_loader.num_workers,
+                                pin_memory=train_loader.pin_memory)
+
+        return loader, importance
+
+
+def select_hard_samples(per_sample_loss, skip_fraction):
+
+    batch_size = per_sample_loss.size(0)
+    num_keep = max(1, math.ceil(batch_size * (1 - skip_fraction)))
+
+    return torch.topk(per_sample_loss, num_keep).indices
@@ -0,0 +1,279 @@
+import asyncio
+import argparse
+import io
+import json
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import torch
+from PIL import Image
+from src.data_loader import get_data_transforms, get_class_names
+from src.models import load_checkpoint
+
+MAX_BODY_BYTES = 20 * 1024 * 1024
+
+
+class MicroBatcher:
+    """Agrupa requisições concorrentes de um modelo em batches dinâmicos (max_batch / max_wait)"""
+
+    def __init__(self, model, transform, class_names, device, decode_executor,
+                 max_batch=32, max_wait_ms=5.0, top_k=5):
+        self.model = model
+        self.transform = transform
+        self.class_names = class_names
+        self.device = device
+        self.decode_executor = decode_executor
+        # Um único thread de inferência por modelo: enquanto um batch roda, o próximo se acumula
+        self.infer_executor = ThreadPoolExecutor(max_workers=1)
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.top_k = min(top_k, len(class_names))
+        self.queue = asyncio.Queue()
+
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.latencies = deque(maxlen=2000)
+        self.batch_sizes = deque(maxlen=2000)
+
+    def _preprocess(self, image_bytes):
+        image = Image.open(io.BytesIO(image_bytes)).convert('RGB')
+        return self.transform(image)
+
+    def _infer(self, inputs):
+        with torch.inference_mode():
+            outputs = self.model(inputs.to(self.device))
+            return torch.softmax(outputs, dim=1).cpu()
+
+    def _format(self, probs):
+        top_probs, top_ids = torch.topk(probs, self.top_k)
+        return {
+            'class_id': int(top_ids[0]),
+            'label': self.class_names[int(top_ids[0])],
+            'top_k': [{'label': self.class_names[int(i)], 'prob': float(p)}
+                      for p, i in zip(top_probs, top_ids)]
+        }
+
+    async def predict(self, image_bytes):
+
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        self.requests += 1
+
+        try:
+            tensor = await loop.run_in_executor(self.decode_executor, self._preprocess, image_bytes)
+        except Exception:
+            self.errors += 1
+            raise
+
+        future = loop.create_future()
+        await self.queue.put((tensor, future))
+        result = await future
+
+        self.latencies.append(time.perf_counter() - start)
+        return result
+
+    async def run(self):
+
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch:
+                if not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            inputs = torch.stack([tensor for tensor, _ in batch])
+            self.batches += 1
+            self.batch_sizes.append(len(batch))
+
+            try:
+                probs = await loop.run_in_executor(self.infer_executor, self._infer, inputs)
+            except Exception as e:
+                self.errors += len(batch)
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), sample_probs in zip(batch, probs):
+                if not future.done():
+                    future.set_result(self._format(sample_probs))
+
+    def metrics(self):
+
+        latencies_ms = np.array(self.latencies) * 1000
+        has_latency = len(latencies_ms) > 0
+
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'batches': self.batches,
+            'queue_depth': self.queue.qsize(),
+            'avg_batch_size': float(np.mean(self.batch_sizes)) if self.batch_sizes else 0.0,
+            'latency_ms_avg': float(latencies_ms.mean()) if has_latency else None,
+            'latency_ms_p50': float(np.percentile(latencies_ms, 50)) if has_latency else None,
+            'latency_ms_p95': float(np.percentile(latencies_ms, 95)) if has_latency else None,
+            'latency_ms_p99': float(np.percentile(latencies_ms, 99)) if has_latency else None
+        }
+
+
+class InferenceServer:
+    """Servidor HTTP/1.1 mínimo sobre asyncio: POST /predict/<modelo>, GET /metrics, GET /health"""
+
+    def __init__(self, batchers):
+        self.batchers = batchers
+
+    async def _respond(self, writer, status, payload, keep_alive):
+
+        reasons = {200: 'OK', 400: 'Bad Request', 404: 'Not Found',
+                   405: 'Method Not Allowed', 413: 'Payload Too Large',
+                   500: 'Internal Server Error'}
+        body = json.dumps(payload).encode()
+        headers = (f'HTTP/1.1 {status} {reasons[status]}\r\n'
+                   f'Content-Type: application/json\r\n'
+                   f'Content-Length: {len(body)}\r\n'
+                   f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n')
+        writer.write(headers.encode() + body)
+        await writer.drain()
+
+    async def _route(self, method, path, body):
+
+        if path == '/health':
+            return 200, {'status': 'ok', 'models': list(self.batchers)}
+        if path == '/metrics':
+            return 200, {name: b.metrics() for name, b in self.batchers.items()}
+
+        if path.startswith('/predict/'):
+            name = path[len('/predict/'):]
+            if name not in self.batchers:
+                return 404, {'error': f'Modelo {name} não carregado'}
+            if method != 'POST':
+                return 405, {'error': 'Use POST com os bytes da imagem no corpo'}
+            try:
+                result = await self.batchers[name].predict(body)
+            except (OSError, ValueError) as e:
+                return 400, {'error': f'Imagem inválida: {e}'}
+            return 200, result
+
+        return 404, {'error': f'Rota {path} não encontrada'}
+
+    async def handle(self, reader, writer):
+
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, version = request_line.decode('latin-1').split()
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    key, _, value = line.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+
+                keep_alive = (version == 'HTTP/1.1'
+                              and headers.get('connection', '').lower() != 'close')
+
+                length = int(headers.get('content-length', 0))
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {'error': 'Imagem muito grande'}, False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                try:
+                    status, payload = await self._route(method, path, body)
+                except Exception as e:
+                    status, payload = 500, {'error': str(e)}
+
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host, port):
+
+        workers = [asyncio.create_task(b.run()) for b in self.batchers.values()]
+        server = await asyncio.start_server(self.handle, host, port)
+
+        print(f"\n Servidor de inferência em http://{host}:{port}")
+        print(f" Modelos: {', '.join(self.batchers)}")
+        print(f" POST /predict/<modelo> | GET /metrics | GET /health\n")
+
+        async with server:
+            try:
+                await server.serve_forever()
+            finally:
+                for worker in workers:
+                    worker.cancel()
+
+
+def parse_model_spec(spec, dataset_name):
+    # "resnet18" ou "resnet18=caminho/para/checkpoint.pth"
+    name, _, path = spec.partition('=')
+    return name, path or f'models/best_models/{name}_{dataset_name}.pth'
+
+
+def main(args):
+
+    device = torch.device(args.device or ('cuda' if torch.cuda.is_available() else 'cpu'))
+    class_names = get_class_names(args.dataset, args.data_dir)
+    _, test_transform = get_data_transforms(args.dataset, args.input_size)
+    decode_executor = ThreadPoolExecutor(max_workers=args.decode_workers)
+
+    batchers = {}
+    for spec in args.model:
+        name, path = parse_model_spec(spec, args.dataset)
+        print(f"Carregando {name} de {path}...")
+        model = load_checkpoint(name, path, num_classes=len(class_names), device=device)
+        batchers[name] = MicroBatcher(model, test_transform, class_names, device,
+                                      decode_executor, max_batch=args.max_batch,
+                                      max_wait_ms=args.max_wait_ms, top_k=args.top_k)
+
+    asyncio.run(InferenceServer(batchers).serve(args.host, args.port))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Servidor de inferência com micro-batching')
+
+    parser.add_argument('--model', type=str, action='append', required=True,
+                       help='Modelo a servir, como nome ou nome=checkpoint.pth (pode repetir)')
+    parser.add_argument('--dataset', type=str, default='CIFAR10',
+                       choices=['MNIST', 'CIFAR10', 'FashionMNIST', 'Shards'],
+                       help='Dataset usado no treino (define classes e transformações)')
+    parser.add_argument('--data_dir', type=str, default='./data',
+                       help='Com --dataset Shards, diretório cujo train/index.json define as classes')
+    parser.add_argument('--input_size', type=int, default=224,
+                       help='Tamanho da imagem de entrada')
+    parser.add_argument('--device', type=str, default=None,
+                       help='Device de inferência (padrão: cuda se disponível)')
+    parser.add_argument('--host', type=str, default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--max_batch', type=int, default=32,
+                       help='Tamanho máximo de cada micro-batch')
+    parser.add_argument('--max_wait_ms', type=float, default=5.0,
+                       help='Espera máxima para completar um micro-batch')
+    parser.add_argument('--decode_workers', type=int, default=4,
+                       help='Threads para decodificar e transformar as imagens')
+    parser.add_argument('--top_k', type=int, default=5,
+                       help='Número de classes mais prováveis na resposta')
+
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,156 @@
+import io
+import os
+import json
+import random
+import tarfile
+import argparse
+from torch.utils.data import IterableDataset, get_worker_info
+from PIL import Image
+
+INDEX_FILE = 'index.json'
+
+
+def _add_bytes(tar, name, data):
+
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    tar.addfile(info, io.BytesIO(data))
+
+
+def write_shards(image_folder, out_dir, samples_per_shard=1000, seed=0):
+    """Converte um diretório no formato ImageFolder em shards .tar com as imagens já codificadas"""
+    from torchvision.datasets import ImageFolder
+
+    folder = ImageFolder(image_folder)
+    samples = list(folder.samples)
+    # Embaralha uma vez para que cada shard tenha classes misturadas
+    random.Random(seed).shuffle(samples)
+
+    os.makedirs(out_dir, exist_ok=True)
+    shards = []
+
+    for shard_idx, start in enumerate(range(0, len(samples), samples_per_shard)):
+        chunk = samples[start:start + samples_per_shard]
+        name = f'shard-{shard_idx:06d}.tar'
+
+        with tarfile.open(os.path.join(out_dir, name), 'w') as tar:
+            for offset, (path, label) in enumerate(chunk):
+                key = f'{start + offset:09d}'
+                ext = os.path.splitext(path)[1].lower()
+                with open(path, 'rb') as f:
+                    _add_bytes(tar, f'{key}{ext}', f.read())
+                _add_bytes(tar, f'{key}.cls', str(label).encode())
+
+        shards.append({'name': name, 'num_samples': len(chunk)})
+        print(f"✓ {name}: {len(chunk)} amostras")
+
+    index = {'classes': folder.classes, 'num_samples': len(samples), 'shards': shards}
+    with open(os.path.join(out_dir, INDEX_FILE), 'w') as f:
+        json.dump(index, f, indent=2)
+
+    print(f"\n✓ {len(samples)} amostras em {len(shards)} shards salvas em: {out_dir}")
+
+    return index
+
+
+def _iter_tar_samples(path):
+    # Leitura sequencial (modo stream); membros de uma mesma amostra são consecutivos
+    current_key, sample = None, {}
+
+    with tarfile.open(path, 'r|') as tar:
+        for member in tar:
+            if not member.isfile():
+                continue
+            key, ext = os.path.splitext(member.name)
+            if key != current_key and sample:
+                yield sample
+                sample = {}
+            current_key = key
+            sample[ext] = tar.extractfile(member).read()
+
+    if sample:
+        yield sample
+
+
+class ShardedDataset(IterableDataset):
+    """Lê shards .tar sequencialmente, com embaralhamento por shard e buffer de tamanho limitado"""
+
+    def __init__(self, shard_dir, transform=None, shuffle=False, shuffle_buffer=1000, seed=0):
+        with open(os.path.join(shard_dir, INDEX_FILE)) as f:
+            index = json.load(f)
+
+        self.shard_dir = shard_dir
+        self.shards = [s['name'] for s in index['shards']]
+        self.classes = index['classes']
+        self.num_samples = index['num_samples']
+        self.transform = transform
+        self.shuffle = shuffle
+        self.shuffle_buffer = shuffle_buffer
+        self.seed = seed
+        self.epoch = 0
+
+    def __len__(self):
+        return self.num_samples
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+
+    def _worker_shards(self):
+
+        shards = list(self.shards)
+        if self.shuffle:
+            # Mesma semente em todos os workers: a permutação é igual e a divisão não se sobrepõe
+            random.Random(self.seed + self.epoch).shuffle(shards)
+
+        worker_info = get_worker_info()
+        if worker_info is not None:
+            shards = shards[worker_info.id::worker_info.num_workers]
+        return shards
+
+    def _decode(self, sample):
+
+        label = int(sample.pop('.cls'))
+        image_bytes = next(iter(sample.values()))
+        image = Image.open(io.BytesIO(image_bytes)).convert('RGB')
+        if self.transform is not None:
+            image = self.transform(image)
+        return image, label
+
+    def __iter__(self):
+
+        worker_info = get_worker_info()
+        worker_id = worker_info.id if worker_info is not None else 0
+        rng = random.Random(self.seed + self.epoch * 1000 + worker_id)
+
+        buffer = []
+        for shard in self._worker_shards():
+            for sample in _iter_tar_samples(os.path.join(self.shard_dir, shard)):
+                if not self.shuffle:
+                    yield self._decode(sample)
+                    continue
+
+                buffer.append(sample)
+                if len(buffer) >= self.shuffle_buffer:
+                    idx = rng.randrange(len(buffer))
+                    buffer[idx], buffer[-1] = buffer[-1], buffer[idx]
+                    yield self._decode(buffer.pop())
+
+        rng.shuffle(buffer)
+        for sample in buffer:
+            yield self._decode(sample)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Converte um ImageFolder em shards .tar')
+
+    parser.add_argument('image_folder', type=str,
+                       help='Diretório com uma subpasta por classe')
+    parser.add_argument('out_dir', type=str,
+                       help='Diretório de saída dos shards')
+    parser.add_argument('--samples_per_shard', type=int, default=1000,
+                       help='Número de amostras por shard')
+    parser.add_argument('--seed', type=int, default=0,
+                       help='Semente do embaralhamento antes de dividir em shards')
+
+    args = parser.parse_args()
+    write_shards(args.image_folder, args.out_dir, args.samples_per_shard, args.seed)
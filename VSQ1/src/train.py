@@ -1,14 +1,49 @@
 import torch
 import torch.nn as nn
 import torch.optim as optim
-from tqdm import tqdm
+from torch.utils.data import IterableDataset
 import time
 import copy
+from src.data_loader import get_stratified_subset_loader
+from src.profiler import TrainingProfiler, print_profile_summary
+from src.sampling import SampleLossTracker, select_hard_samples
+from src.utils import wilson_interval
+
+# tqdm é importado dentro das funções que o usam para não pesar na inicialização
 
 def train_model(model, train_loader, test_loader, criterion, optimizer, 
-                scheduler=None, num_epochs=10, device='cuda'):
+                scheduler=None, num_epochs=10, device='cuda',
+                val_subset_size=None, val_every=1, val_confidence=0.95,
+                loss_sampling=False, skip_fraction=0.0, sampling_warmup_epochs=1,
+                profiler=None):
+    from tqdm import tqdm
     
     model = model.to(device)
+    
+    if profiler is None:
+        profiler = TrainingProfiler(enabled=False)
+    
+    if skip_fraction > 0 and not loss_sampling:
+        raise ValueError("skip_fraction requer loss_sampling=True")
+    if val_every < 1:
+        raise ValueError(f"val_every deve ser >= 1, recebido: {val_every}")
+    if not 0 <= skip_fraction < 1:
+        raise ValueError(f"skip_fraction deve estar em [0, 1): {skip_fraction}")
+    
+    loss_tracker = None
+    if loss_sampling:
+        if isinstance(train_loader.dataset, IterableDataset):
+            raise ValueError("Amostragem por perda requer um dataset com acesso por índice")
+        loss_tracker = SampleLossTracker(len(train_loader.dataset))
+        sample_criterion = copy.copy(criterion)
+        sample_criterion.reduction = 'none'
+    
+    val_subset_loader = None
+    if val_subset_size:
+        val_subset_loader = get_stratified_subset_loader(test_loader, val_subset_size)
+        print(f'Validação por época em subconjunto estratificado de '
+              f'{len(val_subset_loader.dataset)} amostras')
+    
     best_model_wts = copy.deepcopy(model.state_dict())
     best_acc = 0.0
     
@@ -17,8 +52,14 @@ def train_model(model, train_loader, test_loader, criterion, optimizer,
         'train_acc': [],
         'val_loss': [],
         'val_acc': [],
-        'epoch_time': []
+        'val_acc_ci': [],
+        'val_full_eval': [],
+        'epoch_time': [],
+        # 'eval' nas épocas com selective backprop: loss/acc de treino vêm da passada de pontuação
+        'train_metrics_mode': []
     }
+    if profiler.enabled:
+        history['profile'] = []
     
     for epoch in range(num_epochs):
         epoch_start = time.time()
@@ -28,68 +69,124 @@ def train_model(model, train_loader, test_loader, criterion, optimizer,
        
         model.train()
         running_loss = 0.0
-        running_corrects = 0
+        running_corrects = 0.0
+        running_weight = 0.0
         
-        train_bar = tqdm(train_loader, desc='Treinando')
-        for inputs, labels in train_bar:
-            inputs = inputs.to(device)
-            labels = labels.to(device)
+        if hasattr(train_loader.dataset, 'set_epoch'):
+            train_loader.dataset.set_epoch(epoch)
+        
+        epoch_loader = train_loader
+        importance = None
+        selective = False
+        if loss_tracker is not None:
+            weighted = epoch >= sampling_warmup_epochs
+            epoch_loader, importance = loss_tracker.build_loader(train_loader, weighted=weighted)
+            selective = weighted and skip_fraction > 0
+        
+        profiler.start_epoch()
+        train_bar = tqdm(epoch_loader, desc='Treinando')
+        for batch in train_bar:
+            profiler.step_start()
+            inputs = batch[0].to(device)
+            labels = batch[1].to(device)
+            profiler.mark('h2d')
             
             optimizer.zero_grad()
             
-            outputs = model(inputs)
-            _, preds = torch.max(outputs, 1)
-            loss = criterion(outputs, labels)
+            if loss_tracker is None:
+                outputs = model(inputs)
+                _, preds = torch.max(outputs, 1)
+                loss = criterion(outputs, labels)
+                
+                running_loss += loss.item() * inputs.size(0)
+                running_corrects += torch.sum(preds == labels.data).item()
+                running_weight += inputs.size(0)
+            else:
+                indices = batch[2]
+                weights = torch.as_tensor(importance[indices.numpy()], device=device)
+                
+                if selective:
+                    # Selective backprop: passada sem gradiente para pontuar o batch e
+                    # forward/backward apenas nas amostras mais difíceis. A pontuação roda
+                    # em eval() para não atualizar as estatísticas do BatchNorm duas vezes
+                    # nem sofrer ruído do dropout
+                    model.eval()
+                    with torch.no_grad():
+                        outputs = model(inputs)
+                        per_sample_loss = sample_criterion(outputs, labels)
+                    model.train()
+                    keep = select_hard_samples(per_sample_loss, skip_fraction)
+                    loss = criterion(model(inputs[keep]), labels[keep])
+                else:
+                    outputs = model(inputs)
+                    per_sample_loss = sample_criterion(outputs, labels)
+                    loss = per_sample_loss.mean()
+                
+                _, preds = torch.max(outputs, 1)
+                loss_tracker.update(indices, per_sample_loss)
+                
+                running_loss += torch.sum(weights * per_sample_loss.detach()).item()
+                running_corrects += torch.sum(weights * (preds == labels.data)).item()
+                running_weight += weights.sum().item()
             
+            profiler.mark('forward')
             loss.backward()
+            profiler.mark('backward')
             optimizer.step()
-            
-            running_loss += loss.item() * inputs.size(0)
-            running_corrects += torch.sum(preds == labels.data)
+            profiler.mark('optimizer')
+            profiler.step_end(inputs.size(0))
             
             train_bar.set_postfix({'loss': f'{loss.item():.4f}'})
         
-        epoch_loss = running_loss / len(train_loader.dataset)
-        epoch_acc = running_corrects.double() / len(train_loader.dataset)
+        epoch_profile = profiler.end_epoch()
+        
+        epoch_loss = running_loss / running_weight
+        epoch_acc = running_corrects / running_weight
         
         history['train_loss'].append(epoch_loss)
-        history['train_acc'].append(epoch_acc.item())
-        
-     
-        model.eval()
-        val_loss = 0.0
-        val_corrects = 0
-        
-        with torch.no_grad():
-            val_bar = tqdm(test_loader, desc='Validando')
-            for inputs, labels in val_bar:
-                inputs = inputs.to(device)
-                labels = labels.to(device)
-                
-                outputs = model(inputs)
-                _, preds = torch.max(outputs, 1)
-                loss = criterion(outputs, labels)
-                
-                val_loss += loss.item() * inputs.size(0)
-                val_corrects += torch.sum(preds == labels.data)
-                
-                val_bar.set_postfix({'loss': f'{loss.item():.4f}'})
+        history['train_acc'].append(epoch_acc)
+        history['train_metrics_mode'].append('eval' if selective else 'train')
+        
+        is_last_epoch = epoch == num_epochs - 1
+        run_validation = is_last_epoch or (epoch + 1) % val_every == 0
+        val_loss, val_acc, val_ci, full_eval = float('nan'), float('nan'), None, False
         
-        val_loss = val_loss / len(test_loader.dataset)
-        val_acc = val_corrects.double() / len(test_loader.dataset)
+        if run_validation and val_subset_loader is not None:
+            val_loss, val_acc, val_corrects, val_total = _validate(
+                model, val_subset_loader, criterion, device, desc='Validando (subconjunto)')
+            val_ci = wilson_interval(val_corrects, val_total, val_confidence)
+            print(f'Val subconjunto Acc: {val_acc:.4f} '
+                  f'(IC {val_confidence:.0%}: [{val_ci[0]:.4f}, {val_ci[1]:.4f}])')
+            
+            # Só avalia no conjunto completo se o subconjunto não descarta uma melhora
+            full_eval = is_last_epoch or val_ci[1] > best_acc
+        elif run_validation:
+            full_eval = True
+        
+        if full_eval:
+            val_loss, val_acc, _, _ = _validate(model, test_loader, criterion, device)
         
         history['val_loss'].append(val_loss)
-        history['val_acc'].append(val_acc.item())
+        history['val_acc'].append(val_acc)
+        history['val_acc_ci'].append(val_ci)
+        history['val_full_eval'].append(full_eval)
         
         epoch_time = time.time() - epoch_start
         history['epoch_time'].append(epoch_time)
         
-        print(f'\nTrain Loss: {epoch_loss:.4f} Acc: {epoch_acc:.4f}')
-        print(f'Val Loss: {val_loss:.4f} Acc: {val_acc:.4f}')
+        mode_note = ' (medidas em eval(), passada de pontuação)' if selective else ''
+        print(f'\nTrain Loss: {epoch_loss:.4f} Acc: {epoch_acc:.4f}{mode_note}')
+        if run_validation:
+            scope = 'completo' if full_eval else 'subconjunto'
+            print(f'Val Loss: {val_loss:.4f} Acc: {val_acc:.4f} ({scope})')
         print(f'Tempo: {epoch_time:.2f}s')
         
+        if epoch_profile is not None:
+            history['profile'].append(epoch_profile)
+            print_profile_summary(epoch_profile)
+        
         
-        if val_acc > best_acc:
+        if full_eval and val_acc > best_acc:
             best_acc = val_acc
             best_model_wts = copy.deepcopy(model.state_dict())
             print(f'✓ Novo melhor modelo! Val Acc: {val_acc:.4f}')
@@ -98,6 +195,8 @@ def train_model(model, train_loader, test_loader, criterion, optimizer,
         if scheduler is not None:
             scheduler.step()
     
+    profiler.close()
+    
     print(f'\n{"="*60}')
     print(f'Melhor acurácia de validação: {best_acc:.4f}')
     print(f'{"="*60}\n')
@@ -108,6 +207,33 @@ def train_model(model, train_loader, test_loader, criterion, optimizer,
     return model, history
 
 
+def _validate(model, loader, criterion, device, desc='Validando'):
+    from tqdm import tqdm
+    
+    model.eval()
+    val_loss = 0.0
+    val_corrects = 0
+    
+    with torch.no_grad():
+        val_bar = tqdm(loader, desc=desc)
+        for inputs, labels in val_bar:
+            inputs = inputs.to(device)
+            labels = labels.to(device)
+            
+            outputs = model(inputs)
+            _, preds = torch.max(outputs, 1)
+            loss = criterion(outputs, labels)
+            
+            val_loss += loss.item() * inputs.size(0)
+            val_corrects += torch.sum(preds == labels.data).item()
+            
+            val_bar.set_postfix({'loss': f'{loss.item():.4f}'})
+    
+    total = len(loader.dataset)
+    
+    return val_loss / total, val_corrects / total, val_corrects, total
+
+
 def get_optimizer(model, optimizer_name='adam', lr=0.001, momentum=0.9):
     
     if optimizer_name.lower() == 'adam':
@@ -0,0 +1,16 @@
+import math
+from statistics import NormalDist
+
+
+def wilson_interval(corrects, total, confidence=0.95):
+    """Intervalo de confiança de Wilson para uma acurácia medida em `total` amostras"""
+    if total == 0:
+        return 0.0, 1.0
+
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    p = corrects / total
+    denom = 1 + z ** 2 / total
+    center = (p + z ** 2 / (2 * total)) / denom
+    margin = z * math.sqrt(p * (1 - p) / total + z ** 2 / (4 * total ** 2)) / denom
+
+    return max(0.0, center - margin), min(1.0, center + margin)
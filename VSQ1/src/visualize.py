@@ -1,10 +1,10 @@
-import matplotlib.pyplot as plt
-import seaborn as sns
 import numpy as np
-import pandas as pd
 import os
 
+# matplotlib, seaborn e pandas são importados sob demanda em cada função
+
 def plot_training_history(history, model_name, save_dir='results/plots'):
+    import matplotlib.pyplot as plt
     
     os.makedirs(save_dir, exist_ok=True)
     
@@ -16,7 +16,6 @@ def plot_training_history(history, model_name, save_dir='results/plots'):
     axes[0].set_xlabel('Época')
     axes[0].set_ylabel('Loss')
     axes[0].set_title(f'{model_name} - Loss')
-    axes[0].legend()
     axes[0].grid(True, alpha=0.3)
     
     
@@ -25,9 +24,17 @@ def plot_training_history(history, model_name, save_dir='results/plots'):
     axes[1].set_xlabel('Época')
     axes[1].set_ylabel('Acurácia')
     axes[1].set_title(f'{model_name} - Acurácia')
-    axes[1].legend()
     axes[1].grid(True, alpha=0.3)
     
+    # Épocas com selective backprop: métricas de treino medidas em eval(), sem dropout
+    eval_epochs = [epoch for epoch, mode in enumerate(history.get('train_metrics_mode', []))
+                   if mode == 'eval']
+    for ax in axes:
+        for i, epoch in enumerate(eval_epochs):
+            ax.axvspan(epoch - 0.5, epoch + 0.5, color='gray', alpha=0.15,
+                       label='Treino medido em eval()' if i == 0 else None)
+        ax.legend()
+    
     plt.tight_layout()
     plt.savefig(f'{save_dir}/{model_name}_training_history.png', dpi=300, bbox_inches='tight')
     plt.close()
@@ -35,6 +42,8 @@ def plot_training_history(history, model_name, save_dir='results/plots'):
 
 
 def plot_confusion_matrix(cm, class_names, model_name, save_dir='results/confusion_matrices'):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
     
     os.makedirs(save_dir, exist_ok=True)
     
@@ -51,6 +60,7 @@ def plot_confusion_matrix(cm, class_names, model_name, save_dir='results/confusi
 
 
 def plot_metrics_comparison(results_dict, save_dir='results/plots'):
+    import matplotlib.pyplot as plt
     
     os.makedirs(save_dir, exist_ok=True)
     
@@ -87,6 +97,7 @@ def plot_metrics_comparison(results_dict, save_dir='results/plots'):
 
 
 def plot_efficiency_comparison(results_dict, save_dir='results/plots'):
+    import matplotlib.pyplot as plt
     
     os.makedirs(save_dir, exist_ok=True)
     
@@ -140,6 +151,7 @@ def plot_efficiency_comparison(results_dict, save_dir='results/plots'):
 
 
 def save_results_to_csv(results_dict, dataset_name, save_dir='results/metrics'):
+    import pandas as pd
    
     os.makedirs(save_dir, exist_ok=True)
     
@@ -158,6 +170,26 @@ def save_results_to_csv(results_dict, dataset_name, save_dir='results/metrics'):
             'Trainable_Params': metrics.get('trainable_params', 0),
             'Model_Size_MB': metrics.get('model_size_mb', 0)
         }
+        
+        # Colunas de memória e da cascata logo após as de latência
+        memory_row = {}
+        if 'serialized_size_mb' in metrics:
+            memory_row['Serialized_Size_MB'] = metrics['serialized_size_mb']
+        for batch_size, mem in metrics.get('memory', {}).items():
+            memory_row[f'Peak_RSS_Inference_MB_bs{batch_size}'] = mem['peak_rss_inference_mb']
+            memory_row[f'Peak_RSS_Train_MB_bs{batch_size}'] = mem['peak_rss_train_mb']
+            memory_row[f'Activation_MB_bs{batch_size}'] = mem['activation_mb']
+            if 'peak_cuda_train_mb' in mem:
+                memory_row[f'Peak_CUDA_Inference_MB_bs{batch_size}'] = mem['peak_cuda_inference_mb']
+                memory_row[f'Peak_CUDA_Train_MB_bs{batch_size}'] = mem['peak_cuda_train_mb']
+        
+        if 'escalation_rate' in metrics:
+            memory_row['Escalation_Rate'] = metrics['escalation_rate']
+            memory_row['Cascade_Threshold'] = metrics['cascade_threshold']
+        
+        columns = list(row.items())
+        latency_end = list(row).index('Samples_Per_Second') + 1
+        row = dict(columns[:latency_end] + list(memory_row.items()) + columns[latency_end:])
         data.append(row)
     
     df = pd.DataFrame(data)
@@ -165,4 +197,23 @@ def save_results_to_csv(results_dict, dataset_name, save_dir='results/metrics'):
     df.to_csv(filepath, index=False)
     print(f"✓ Resultados salvos em: {filepath}")
     
-    return df
\ No newline at end of file
+    return df
+
+
+def save_activation_memory_to_csv(memory, model_name, save_dir='results/metrics'):
+    import pandas as pd
+    
+    os.makedirs(save_dir, exist_ok=True)
+    
+    data = []
+    for batch_size, mem in memory.items():
+        for layer_name, size_mb in mem['activation_per_layer']:
+            data.append({'Batch_Size': batch_size, 'Layer': layer_name,
+                         'Activation_MB': size_mb})
+    
+    df = pd.DataFrame(data)
+    filepath = f'{save_dir}/{model_name}_activation_memory.csv'
+    df.to_csv(filepath, index=False)
+    print(f"✓ Memória de ativações por camada salva em: {filepath}")
+    
+    return df
@@ -0,0 +1,216 @@
+import os
+import csv
+import json
+import time
+import argparse
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import torch
+
+import style_transfer as st
+
+# VGG-19 carregada uma única vez por processo do pool (ver _init_worker)
+_worker_cnn = None
+_worker_cache = None
+
+
+def _init_worker(num_threads, cache_dir):
+    global _worker_cnn, _worker_cache
+    torch.set_num_threads(num_threads)
+    _worker_cnn = st.load_vgg19()
+    _worker_cache = st.FeatureCache(cache_dir) if cache_dir else None
+
+
+def run_job(job):
+    """Executa um job (conteúdo, estilo, saída e opções) e salva o resultado sem GUI"""
+    start = time.time()
+    imsize = job.get('imsize', st.config.imsize)
+    style_img = st.load_image(job['style'], imsize)
+    options = {
+        'style_weight': job.get('style_weight', st.config.style_weight),
+        'content_weight': job.get('content_weight', st.config.content_weight),
+        'optimizer_name': job.get('optimizer', st.config.optimizer),
+        'tol': job.get('tol', st.config.convergence_tol),
+        'patience': job.get('patience', st.config.convergence_patience)
+    }
+
+    if job.get('tile_size'):
+        content_img = st.load_image(job['content'], None, keep_aspect=True, to_device=False)
+        output = st.run_tiled_style_transfer(
+            _worker_cnn, content_img, style_img,
+            tile_size=job['tile_size'],
+            overlap=job.get('tile_overlap', st.config.tile_overlap),
+            workers=job.get('tile_workers', st.config.tile_workers),
+            num_steps=job.get('num_steps', st.config.num_steps),
+            **options
+        )
+    elif job.get('pyramid_sizes'):
+        content_img = st.load_image(job['content'], imsize)
+        output = st.run_style_transfer_pyramid(
+            _worker_cnn, content_img, style_img,
+            sizes=job['pyramid_sizes'],
+            steps=job.get('pyramid_steps', st.config.pyramid_steps),
+            cache=_worker_cache,
+            **options
+        )
+    else:
+        content_img = st.load_image(job['content'], imsize)
+        output = st.run_style_transfer(
+            _worker_cnn, content_img, style_img, content_img.clone(),
+            num_steps=job.get('num_steps', st.config.num_steps),
+            cache=_worker_cache,
+            **options
+        )
+
+    st.save_image(output, job['output'])
+    return job['output'], time.time() - start
+
+
+def int_list(value):
+    # "64,128,256" -> [64, 128, 256]; usado no CSV do manifesto e na linha de comando
+    try:
+        return [int(v) for v in value.split(',')]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Esperada lista de inteiros separados por vírgula: {value}")
+
+
+CSV_FIELD_TYPES = {'imsize': int, 'num_steps': int, 'tile_size': int, 'tile_overlap': int,
+                   'tile_workers': int, 'patience': int, 'style_weight': float,
+                   'content_weight': float, 'tol': float,
+                   'pyramid_sizes': int_list, 'pyramid_steps': int_list}
+
+
+def _parse_csv_row(row):
+    # Campos vazios usam o padrão da linha de comando
+    return {key: CSV_FIELD_TYPES.get(key, str)(value)
+            for key, value in row.items() if value not in (None, '')}
+
+
+def load_manifest(path):
+    """Lê jobs de um arquivo .json (lista), .jsonl (um por linha) ou .csv (colunas content,style,output)"""
+    with open(path) as f:
+        if path.endswith('.jsonl'):
+            return [json.loads(line) for line in f if line.strip()]
+        if path.endswith('.csv'):
+            return [_parse_csv_row(row) for row in csv.DictReader(f)]
+        return json.load(f)
+
+
+def run_jobs(jobs, workers=1, cache_dir=None, tile_workers=1):
+
+    # Cada processo roda até tile_workers tiles em paralelo (threads); não ultrapassar os núcleos
+    num_threads = max(1, (os.cpu_count() or 1) // (workers * tile_workers))
+    failed = 0
+
+    if workers == 1:
+        _init_worker(num_threads, cache_dir)
+        for job in jobs:
+            try:
+                output, elapsed = run_job(job)
+                print(f"✓ {output} ({elapsed:.1f}s)")
+            except Exception as e:
+                failed += 1
+                print(f"✗ Falha em {job['content']}: {e}")
+        return failed
+
+    # spawn: cada worker inicializa torch/CUDA do zero e carrega a VGG uma vez
+    ctx = mp.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                             initializer=_init_worker,
+                             initargs=(num_threads, cache_dir)) as executor:
+        futures = {executor.submit(run_job, job): job for job in jobs}
+        for future in as_completed(futures):
+            try:
+                output, elapsed = future.result()
+                print(f"✓ {output} ({elapsed:.1f}s)")
+            except Exception as e:
+                failed += 1
+                print(f"✗ Falha em {futures[future]['content']}: {e}")
+
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Neural style transfer em lote, sem interface gráfica')
+
+    parser.add_argument('--content', type=str, help='Imagem de conteúdo')
+    parser.add_argument('--style', type=str, help='Imagem de estilo')
+    parser.add_argument('--output', type=str, default='resultado_nst.png',
+                       help='Arquivo de saída (job único)')
+    parser.add_argument('--manifest', type=str, default=None,
+                       help='Arquivo .json/.jsonl/.csv com uma lista de jobs')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='Processos do pool; cada um carrega a VGG-19 uma vez')
+    parser.add_argument('--imsize', type=int, default=st.config.imsize)
+    parser.add_argument('--num_steps', type=int, default=st.config.num_steps)
+    parser.add_argument('--optimizer', type=str, default=st.config.optimizer,
+                       choices=['adam', 'lbfgs'])
+    parser.add_argument('--style_weight', type=float, default=st.config.style_weight)
+    parser.add_argument('--content_weight', type=float, default=st.config.content_weight)
+    parser.add_argument('--tile_size', type=int, default=None,
+                       help='Processar em tiles deste tamanho (imagens grandes)')
+    parser.add_argument('--tile_overlap', type=int, default=st.config.tile_overlap,
+                       help='Sobreposição entre tiles vizinhos, em pixels')
+    parser.add_argument('--tile_workers', type=int, default=st.config.tile_workers,
+                       help='Tiles estilizados em paralelo dentro de cada job')
+    parser.add_argument('--pyramid_sizes', type=int_list, default=st.config.pyramid_sizes,
+                       help='Tamanhos da pirâmide separados por vírgula, ex.: 128,256,512')
+    parser.add_argument('--pyramid_steps', type=int_list, default=st.config.pyramid_steps,
+                       help='Passos por nível da pirâmide, ex.: 200,80,20')
+    parser.add_argument('--cache_dir', type=str, default=st.config.cache_dir,
+                       help='Cache de alvos de estilo/conteúdo ("" desativa)')
+    parser.add_argument('--video', type=str, default=None,
+                       help='Vídeo de entrada; --output deve ser um .mp4')
+    parser.add_argument('--later_steps', type=int, default=st.config.video_later_steps,
+                       help='Passos por frame após o primeiro (vídeo)')
+    parser.add_argument('--temporal_weight', type=float, default=st.config.video_temporal_weight,
+                       help='Peso da perda de consistência temporal (vídeo)')
+    parser.add_argument('--max_frames', type=int, default=None,
+                       help='Limite de frames processados (vídeo)')
+
+    args = parser.parse_args()
+
+    defaults = {
+        'imsize': args.imsize,
+        'num_steps': args.num_steps,
+        'optimizer': args.optimizer,
+        'style_weight': args.style_weight,
+        'content_weight': args.content_weight,
+        'tile_size': args.tile_size,
+        'tile_overlap': args.tile_overlap,
+        'tile_workers': args.tile_workers,
+        'pyramid_sizes': args.pyramid_sizes,
+        'pyramid_steps': args.pyramid_steps
+    }
+
+    if args.video:
+        if not args.style:
+            parser.error('Informe --style junto com --video')
+        # Frames dependem do anterior: o vídeo é processado em sequência, num único processo
+        st.stylize_video(st.load_vgg19(), args.video, st.load_image(args.style, args.imsize),
+                         args.output, imsize=args.imsize, first_steps=args.num_steps,
+                         later_steps=args.later_steps, temporal_weight=args.temporal_weight,
+                         max_frames=args.max_frames, style_weight=args.style_weight,
+                         content_weight=args.content_weight, optimizer_name=args.optimizer,
+                         tol=st.config.convergence_tol,
+                         patience=st.config.convergence_patience)
+        return
+    
+    if args.manifest:
+        jobs = [{**defaults, **job} for job in load_manifest(args.manifest)]
+    elif args.content and args.style:
+        jobs = [{**defaults, 'content': args.content, 'style': args.style,
+                 'output': args.output}]
+    else:
+        parser.error('Informe --content e --style, ou --manifest')
+
+    print(f"{len(jobs)} job(s) com {args.workers} worker(s) em {st.device}")
+    tile_workers = max((job['tile_workers'] for job in jobs if job.get('tile_size')), default=1)
+    failed = run_jobs(jobs, workers=args.workers, cache_dir=args.cache_dir or None,
+                      tile_workers=tile_workers)
+    if failed:
+        raise SystemExit(f"{failed} job(s) falharam")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,265 @@
+import os
+import time
+import argparse
+import torch
+import torch.nn as nn
+import torch.optim as optim
+from torch.utils.data import Dataset, DataLoader
+from torchvision import transforms
+from PIL import Image
+
+from style_transfer import (device, config, load_image, load_vgg19, get_style_model_and_losses,
+                            compute_style_targets, compute_content_targets)
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+
+
+class ConvLayer(nn.Module):
+    def __init__(self, in_channels, out_channels, kernel_size, stride):
+        super(ConvLayer, self).__init__()
+        self.pad = nn.ReflectionPad2d(kernel_size // 2)
+        self.conv = nn.Conv2d(in_channels, out_channels, kernel_size, stride)
+
+    def forward(self, x):
+        return self.conv(self.pad(x))
+
+
+class ResidualBlock(nn.Module):
+    def __init__(self, channels):
+        super(ResidualBlock, self).__init__()
+        self.block = nn.Sequential(
+            ConvLayer(channels, channels, 3, 1),
+            nn.InstanceNorm2d(channels, affine=True),
+            nn.ReLU(inplace=True),
+            ConvLayer(channels, channels, 3, 1),
+            nn.InstanceNorm2d(channels, affine=True)
+        )
+
+    def forward(self, x):
+        return x + self.block(x)
+
+
+class UpsampleConvLayer(nn.Module):
+    def __init__(self, in_channels, out_channels, kernel_size, upsample=2):
+        super(UpsampleConvLayer, self).__init__()
+        self.upsample = upsample
+        self.conv = ConvLayer(in_channels, out_channels, kernel_size, 1)
+
+    def forward(self, x):
+        x = nn.functional.interpolate(x, scale_factor=self.upsample, mode='nearest')
+        return self.conv(x)
+
+
+class TransformerNet(nn.Module):
+    """Rede de transformação de imagem (Johnson et al.): um forward por imagem estilizada"""
+    def __init__(self):
+        super(TransformerNet, self).__init__()
+        self.model = nn.Sequential(
+            ConvLayer(3, 32, 9, 1), nn.InstanceNorm2d(32, affine=True), nn.ReLU(inplace=True),
+            ConvLayer(32, 64, 3, 2), nn.InstanceNorm2d(64, affine=True), nn.ReLU(inplace=True),
+            ConvLayer(64, 128, 3, 2), nn.InstanceNorm2d(128, affine=True), nn.ReLU(inplace=True),
+            *[ResidualBlock(128) for _ in range(5)],
+            UpsampleConvLayer(128, 64, 3), nn.InstanceNorm2d(64, affine=True), nn.ReLU(inplace=True),
+            UpsampleConvLayer(64, 32, 3), nn.InstanceNorm2d(32, affine=True), nn.ReLU(inplace=True),
+            ConvLayer(32, 3, 9, 1)
+        )
+
+    def forward(self, x):
+        # Saída em [0, 1], o mesmo espaço das imagens usadas pela rede de perda
+        return torch.sigmoid(self.model(x))
+
+
+class ContentFolder(Dataset):
+    """Todas as imagens de um diretório (recursivo), recortadas no tamanho de treino"""
+    def __init__(self, root, imsize):
+        self.paths = sorted(
+            os.path.join(dirpath, f)
+            for dirpath, _, files in os.walk(root)
+            for f in files if f.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        if not self.paths:
+            raise ValueError(f"Nenhuma imagem encontrada em {root}")
+        self.transform = transforms.Compose([
+            transforms.Resize(imsize),
+            transforms.CenterCrop(imsize),
+            transforms.ToTensor()
+        ])
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __getitem__(self, idx):
+        return self.transform(Image.open(self.paths[idx]).convert('RGB'))
+
+
+def total_variation(images):
+    """Penaliza ruído de alta frequência na saída da rede"""
+    return ((images[:, :, 1:, :] - images[:, :, :-1, :]).abs().mean(dim=(1, 2, 3)) +
+            (images[:, :, :, 1:] - images[:, :, :, :-1]).abs().mean(dim=(1, 2, 3)))
+
+
+def save_checkpoint(path, net, optimizer, epoch, step, style_path):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    torch.save({
+        'model': net.state_dict(),
+        'optimizer': optimizer.state_dict(),
+        'epoch': epoch,
+        'step': step,
+        'style': style_path
+    }, path)
+
+
+def train_style_network(cnn, style_path, content_dir, checkpoint_path, imsize=256,
+                        epochs=2, batch_size=4, lr=1e-3, style_weight=100000,
+                        content_weight=1, tv_weight=0.0, checkpoint_every=500,
+                        resume=False, num_workers=2):
+    """Treina uma TransformerNet para um estilo sobre uma pasta de imagens de conteúdo"""
+    # Dois downsamples de stride 2 e dois upsamples x2: só múltiplos de 4 voltam ao tamanho original
+    if imsize % 4 != 0:
+        raise ValueError(f"imsize deve ser múltiplo de 4 para a TransformerNet, recebido: {imsize}")
+    
+    dataset = ContentFolder(content_dir, imsize)
+    if len(dataset) < batch_size:
+        raise ValueError(f"{content_dir} tem {len(dataset)} imagens, menos que batch_size "
+                         f"({batch_size}); com drop_last nenhum batch seria formado")
+    loader = DataLoader(dataset, batch_size=batch_size, shuffle=True,
+                        num_workers=num_workers, drop_last=True)
+
+    net = TransformerNet().to(device)
+    optimizer = optim.Adam(net.parameters(), lr=lr)
+    start_epoch, step = 0, 0
+
+    if resume and os.path.exists(checkpoint_path):
+        checkpoint = torch.load(checkpoint_path, map_location=device)
+        net.load_state_dict(checkpoint['model'])
+        optimizer.load_state_dict(checkpoint['optimizer'])
+        start_epoch, step = checkpoint['epoch'], checkpoint['step']
+        print(f"Retomando do passo {step} (época {start_epoch + 1})")
+
+    # Alvos de estilo calculados uma vez (batch 1, compartilhados por todo batch de conteúdo)
+    style_img = load_image(style_path, imsize)
+    style_targets = compute_style_targets(cnn, style_img, config.style_layers)
+
+    # Rede de perda montada uma vez; só os alvos de conteúdo mudam a cada batch
+    dummy_batch = torch.zeros(batch_size, 3, imsize, imsize, device=device)
+    loss_net, style_losses, content_losses = get_style_model_and_losses(
+        cnn, style_img, dummy_batch, config.content_layers, config.style_layers,
+        style_targets=style_targets)
+    loss_net.eval()
+    loss_net.requires_grad_(False)
+
+    print(f"\nTreinando rede de estilo com {len(dataset)} imagens de conteúdo")
+    print('-' * 60)
+
+    for epoch in range(start_epoch, epochs):
+        net.train()
+        epoch_start = time.time()
+
+        for content_batch in loader:
+            content_batch = content_batch.to(device)
+            targets = compute_content_targets(cnn, content_batch, config.content_layers)
+            for content_loss, target in zip(content_losses, targets.values()):
+                content_loss.target = target
+
+            optimizer.zero_grad()
+            output = net(content_batch)
+            loss_net(output)
+
+            style_score = style_weight * sum(sl.loss for sl in style_losses)
+            content_score = content_weight * sum(cl.loss for cl in content_losses)
+            loss = (style_score + content_score + tv_weight * total_variation(output)).mean()
+            loss.backward()
+            optimizer.step()
+            step += 1
+
+            if step % 50 == 0:
+                print(f"Época {epoch + 1} | Passo {step:6d} | "
+                      f"Estilo: {style_score.mean().item():10.2f} | "
+                      f"Conteúdo: {content_score.mean().item():8.2f} | "
+                      f"Total: {loss.item():10.2f}")
+
+            if step % checkpoint_every == 0:
+                save_checkpoint(checkpoint_path, net, optimizer, epoch, step, style_path)
+
+        save_checkpoint(checkpoint_path, net, optimizer, epoch + 1, step, style_path)
+        print(f"✓ Época {epoch + 1} concluída em {time.time() - epoch_start:.1f}s, "
+              f"checkpoint salvo em: {checkpoint_path}")
+
+    return net
+
+
+def load_style_network(checkpoint_path):
+    net = TransformerNet().to(device)
+    checkpoint = torch.load(checkpoint_path, map_location=device)
+    net.load_state_dict(checkpoint['model'])
+    return net.eval()
+
+
+def stylize_images(net, image_paths, output_dir, max_size=None):
+    """Estiliza cada imagem com um único forward da rede treinada"""
+    os.makedirs(output_dir, exist_ok=True)
+    to_image = transforms.ToPILImage()
+
+    for path in image_paths:
+        image = Image.open(path).convert('RGB')
+        if max_size is not None:
+            image.thumbnail((max_size, max_size))
+
+        start = time.time()
+        with torch.inference_mode():
+            output = net(transforms.functional.to_tensor(image).unsqueeze(0).to(device))
+        elapsed = time.time() - start
+
+        output_path = os.path.join(output_dir, os.path.basename(path))
+        to_image(output.squeeze(0).cpu()).save(output_path)
+        print(f"✓ {output_path} ({elapsed * 1000:.0f} ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Style transfer rápido com redes treinadas por estilo')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    train_parser = subparsers.add_parser('train', help='Treina uma rede para um estilo')
+    train_parser.add_argument('--style', type=str, required=True, help='Imagem de estilo')
+    train_parser.add_argument('--content_dir', type=str, required=True,
+                              help='Pasta com imagens de conteúdo para o treino')
+    train_parser.add_argument('--checkpoint', type=str, required=True,
+                              help='Arquivo de checkpoint (.pth)')
+    train_parser.add_argument('--imsize', type=int, default=256)
+    train_parser.add_argument('--epochs', type=int, default=2)
+    train_parser.add_argument('--batch_size', type=int, default=4)
+    train_parser.add_argument('--lr', type=float, default=1e-3)
+    train_parser.add_argument('--style_weight', type=float, default=config.style_weight)
+    train_parser.add_argument('--content_weight', type=float, default=config.content_weight)
+    train_parser.add_argument('--tv_weight', type=float, default=0.0)
+    train_parser.add_argument('--checkpoint_every', type=int, default=500,
+                              help='Salvar checkpoint a cada N passos')
+    train_parser.add_argument('--resume', action='store_true',
+                              help='Continuar a partir do checkpoint existente')
+
+    stylize_parser = subparsers.add_parser('stylize', help='Estiliza imagens com uma rede treinada')
+    stylize_parser.add_argument('--checkpoint', type=str, required=True)
+    stylize_parser.add_argument('--output_dir', type=str, default='stylized')
+    stylize_parser.add_argument('--max_size', type=int, default=None,
+                                help='Reduz imagens maiores que este lado')
+    stylize_parser.add_argument('images', nargs='+', help='Imagens de conteúdo')
+
+    args = parser.parse_args()
+
+    if args.command == 'train':
+        cnn = load_vgg19()
+        train_style_network(cnn, args.style, args.content_dir, args.checkpoint,
+                            imsize=args.imsize, epochs=args.epochs,
+                            batch_size=args.batch_size, lr=args.lr,
+                            style_weight=args.style_weight,
+                            content_weight=args.content_weight,
+                            tv_weight=args.tv_weight,
+                            checkpoint_every=args.checkpoint_every,
+                            resume=args.resume)
+    else:
+        net = load_style_network(args.checkpoint)
+        stylize_images(net, args.images, args.output_dir, args.max_size)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,665 @@
+import torch
+import torch.nn as nn
+import torch.optim as optim
+from torchvision import transforms, models
+from PIL import Image
+import numpy as np
+import os
+import time
+import hashlib
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+torch.set_default_dtype(torch.float32)
+
+class Config:
+    imsize = 512 if torch.cuda.is_available() else 256
+    
+    style_weight = 100000
+    content_weight = 1
+    
+    num_steps = 300
+    
+    optimizer = 'adam'  # 'adam' ou 'lbfgs'
+    convergence_tol = 1e-4
+    convergence_patience = 5
+    
+    content_layers = ['21'] 
+    style_layers = ['0', '5', '10', '19', '28']
+    
+    cache_dir = 'nst_cache'
+    
+    # Modo pirâmide: lados de cada nível (do menor ao maior) e passos por nível.
+    # Ex.: pyramid_sizes = [imsize // 4, imsize // 2, imsize]
+    pyramid_sizes = None
+    pyramid_steps = [200, 80, 20]
+    
+    # Modo em tiles para imagens grandes: memória limitada pelo tamanho do tile
+    tile_size = None  # ex.: 512
+    tile_overlap = 64
+    tile_workers = 2
+    
+    # Vídeo: passos do primeiro frame vêm de num_steps; os seguintes partem do frame anterior
+    video_later_steps = 50
+    video_temporal_weight = 0.0  # ex.: 1e4 para reduzir flicker
+
+config = Config()
+
+def load_vgg19():
+    """Carrega as camadas convolucionais da VGG-19 pré-treinada, congeladas"""
+    cnn = models.vgg19(weights='IMAGENET1K_V1').features.to(device).eval()
+    cnn.requires_grad_(False)
+    return cnn
+
+def load_image(image_path, imsize, keep_aspect=False, to_device=True):
+    """Carrega e processa uma imagem
+
+    Com keep_aspect=True o maior lado passa a ter `imsize` pixels sem distorcer a imagem
+    (imsize=None mantém a resolução original).
+    """
+    image = Image.open(image_path).convert('RGB')
+    
+    if keep_aspect:
+        if imsize is not None:
+            scale = imsize / max(image.size)
+            image = image.resize((max(1, round(image.width * scale)),
+                                  max(1, round(image.height * scale))), Image.LANCZOS)
+        loader = transforms.ToTensor()
+    else:
+        loader = transforms.Compose([
+            transforms.Resize((imsize, imsize)),
+            transforms.ToTensor()
+        ])
+    
+    image = loader(image).unsqueeze(0)
+    if not to_device:
+        return image.float()
+    return image.to(device, torch.float)
+
+def tensor_to_image(tensor):
+    """Converte tensor para imagem numpy"""
+    image = tensor.cpu().clone().detach()
+    image = image.squeeze(0)
+    image = image.permute(1, 2, 0)
+    image = image.numpy()
+    image = np.clip(image, 0, 1)
+    return image
+
+def save_image(tensor, path):
+    """Salva um tensor (1, 3, H, W) em [0, 1] como arquivo de imagem"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    image = (tensor_to_image(tensor) * 255).round().astype(np.uint8)
+    Image.fromarray(image).save(path)
+
+
+class ContentLoss(nn.Module):
+    def __init__(self, target):
+        super(ContentLoss, self).__init__()
+        self.target = target.detach()
+
+    def forward(self, input):
+        # Perda por imagem do batch (o alvo pode ter batch 1 e ser compartilhado)
+        self.loss = ((input - self.target) ** 2).mean(dim=(1, 2, 3))
+        return input
+
+def gram_matrix(input):
+    """Calcula a matriz de Gram de cada imagem do batch"""
+    batch, channels, height, width = input.size()
+    features = input.view(batch, channels, height * width)
+    G = torch.bmm(features, features.transpose(1, 2))
+    return G.div(channels * height * width)
+
+class StyleLoss(nn.Module):
+    def __init__(self, target_feature=None, target_gram=None):
+        super(StyleLoss, self).__init__()
+        if target_gram is None:
+            target_gram = gram_matrix(target_feature)
+        self.target = target_gram.detach()
+
+    def forward(self, input):
+        G = gram_matrix(input)
+        self.loss = ((G - self.target) ** 2).mean(dim=(1, 2))
+        return input
+
+cnn_normalization_mean = torch.tensor([0.485, 0.456, 0.406]).to(device)
+cnn_normalization_std = torch.tensor([0.229, 0.224, 0.225]).to(device)
+
+class Normalization(nn.Module):
+    def __init__(self, mean, std):
+        super(Normalization, self).__init__()
+        self.mean = mean.view(-1, 1, 1)
+        self.std = std.view(-1, 1, 1)
+
+    def forward(self, img):
+        return (img - self.mean) / self.std
+
+class FeatureCache:
+    """Cache em disco de matrizes de Gram e features de conteúdo, por imagem, tamanho e camadas"""
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, kind, image, layers):
+        image_hash = hashlib.sha256(image.detach().cpu().numpy().tobytes()).hexdigest()[:32]
+        height, width = image.shape[-2:]
+        return f"{kind}_{image_hash}_{height}x{width}_{'-'.join(layers)}"
+
+    def get(self, key):
+        path = os.path.join(self.cache_dir, f"{key}.pt")
+        if not os.path.exists(path):
+            return None
+        return torch.load(path, map_location=device)
+
+    def put(self, key, targets):
+        path = os.path.join(self.cache_dir, f"{key}.pt")
+        # Escrita atômica: workers que compartilham o cache nunca leem um arquivo pela metade
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                torch.save({name: t.cpu() for name, t in targets.items()}, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+def get_truncated_layers(cnn, last_layer):
+    """Camadas da VGG até a camada mais profunda usada; o resto não contribui para as perdas"""
+    layers = []
+    
+    i = 0
+    for layer in cnn.children():
+        if i > last_layer:
+            break
+        if isinstance(layer, nn.Conv2d):
+            name = f'conv_{i}'
+        elif isinstance(layer, nn.ReLU):
+            name = f'relu_{i}'
+            layer = nn.ReLU(inplace=False)
+        elif isinstance(layer, nn.MaxPool2d):
+            name = f'pool_{i}'
+        elif isinstance(layer, nn.BatchNorm2d):
+            name = f'bn_{i}'
+        else:
+            continue
+        
+        layers.append((i, name, layer))
+        i += 1
+    
+    return layers
+
+def extract_features(cnn, images, layer_ids):
+    """Saídas das camadas pedidas em uma única passada pela rede truncada"""
+    layers = get_truncated_layers(cnn, max(int(l) for l in layer_ids))
+    normalization = Normalization(cnn_normalization_mean, cnn_normalization_std).to(device)
+    
+    features = {}
+    with torch.no_grad():
+        x = normalization(images)
+        for i, _, layer in layers:
+            x = layer(x)
+            if str(i) in layer_ids:
+                features[str(i)] = x.detach()
+    
+    return features
+
+def _compute_targets(cnn, images, layer_ids, kind, cache=None):
+    """Calcula (ou lê do cache) os alvos de cada imagem do batch, separadamente"""
+    layer_ids = sorted(layer_ids, key=int)
+    per_image = [None] * images.size(0)
+    keys = [None] * images.size(0)
+    
+    if cache is not None:
+        for n in range(images.size(0)):
+            keys[n] = cache.key(kind, images[n:n + 1], layer_ids)
+            per_image[n] = cache.get(keys[n])
+    
+    missing = [n for n, targets in enumerate(per_image) if targets is None]
+    if missing:
+        features = extract_features(cnn, images[missing], layer_ids)
+        if kind == 'style':
+            features = {name: gram_matrix(f) for name, f in features.items()}
+        
+        for j, n in enumerate(missing):
+            per_image[n] = {name: f[j:j + 1] for name, f in features.items()}
+            if cache is not None:
+                cache.put(keys[n], per_image[n])
+    
+    return {name: torch.cat([targets[name] for targets in per_image])
+            for name in layer_ids}
+
+def compute_style_targets(cnn, style_img, style_layers, cache=None):
+    """Matrizes de Gram alvo de cada camada de estilo"""
+    return _compute_targets(cnn, style_img, style_layers, 'style', cache)
+
+def compute_content_targets(cnn, content_img, content_layers, cache=None):
+    """Features alvo de cada camada de conteúdo"""
+    return _compute_targets(cnn, content_img, content_layers, 'content', cache)
+
+def get_style_model_and_losses(cnn, style_img, content_img, 
+                                content_layers, style_layers,
+                                cache=None, style_targets=None):
+    """Constrói o modelo com camadas de perda, truncado na camada mais profunda configurada"""
+    
+    normalization = Normalization(cnn_normalization_mean, cnn_normalization_std).to(device)
+    
+    if style_targets is None:
+        style_targets = compute_style_targets(cnn, style_img, style_layers, cache)
+    content_targets = compute_content_targets(cnn, content_img, content_layers, cache)
+    
+    content_losses = []
+    style_losses = []
+    
+    model = nn.Sequential(normalization)
+    
+    last_layer = max(int(l) for l in list(content_layers) + list(style_layers))
+    layers = get_truncated_layers(cnn, last_layer)
+    for i, name, layer in layers:
+        model.add_module(name, layer)
+        
+        if str(i) in content_layers:
+            content_loss = ContentLoss(content_targets[str(i)])
+            model.add_module(f"content_loss_{i}", content_loss)
+            content_losses.append(content_loss)
+            print(f"Adicionada perda de conteúdo na camada {i}")
+        
+        if str(i) in style_layers:
+            style_loss = StyleLoss(target_gram=style_targets[str(i)])
+            model.add_module(f"style_loss_{i}", style_loss)
+            style_losses.append(style_loss)
+            print(f"Adicionada perda de estilo na camada {i}")
+    
+    print(f"\Resumo:")
+    print(f"Perdas de conteúdo: {len(content_losses)}")
+    print(f"Perdas de estilo: {len(style_losses)}")
+    print(f"Camadas da VGG usadas: {len(layers)}")
+    
+    if len(content_losses) == 0:
+        print("AVISO: Nenhuma perda de conteúdo foi adicionada!")
+        print(f"Camadas de conteúdo configuradas: {content_layers}")
+        print(f"Total de camadas processadas: {len(layers)}")
+    
+    if len(style_losses) == 0:
+        print("AVISO: Nenhuma perda de estilo foi adicionada!")
+        print(f"Camadas de estilo configuradas: {style_layers}")
+    
+    return model, style_losses, content_losses
+
+def run_style_transfer(cnn, content_img, style_img, input_img, 
+                       num_steps=300, style_weight=100000, content_weight=1,
+                       cache=None, optimizer_name='adam', tol=None, patience=5,
+                       return_stats=False, style_targets=None,
+                       temporal_target=None, temporal_mask=None, temporal_weight=0.0):
+    """Executa o transfer de estilo para um batch de imagens
+
+    style_weight e content_weight podem ser escalares ou uma lista com um peso por imagem.
+    Com `tol`, para quando a variação relativa da perda total fica abaixo de `tol` por
+    `patience` passos seguidos. Com return_stats=True retorna também passos e tempo.
+    Com temporal_target (ex.: o frame anterior já estilizado), penaliza a diferença para
+    ele nos pixels indicados por temporal_mask.
+    """
+    print('🔧 Construindo o modelo de style transfer...')
+    
+    model, style_losses, content_losses = get_style_model_and_losses(
+        cnn, style_img, content_img, config.content_layers, config.style_layers,
+        cache=cache, style_targets=style_targets)
+    
+    if len(style_losses) == 0:
+        raise ValueError(f"""
+        Nenhuma camada de estilo encontrada! 
+        Camadas configuradas: {config.style_layers}
+        Verifique se os índices correspondem às camadas da VGG-19
+        """)
+    if len(content_losses) == 0:
+        raise ValueError(f"""
+        Nenhuma camada de conteúdo encontrada!
+        Camadas configuradas: {config.content_layers}
+        Verifique se os índices correspondem às camadas da VGG-19
+        """)
+    
+    batch_size = input_img.size(0)
+    style_weight = torch.as_tensor(style_weight, dtype=torch.float, device=device).expand(batch_size)
+    content_weight = torch.as_tensor(content_weight, dtype=torch.float, device=device).expand(batch_size)
+    
+    input_img.requires_grad_(True)
+    if optimizer_name == 'adam':
+        optimizer = optim.Adam([input_img], lr=0.003)
+    elif optimizer_name == 'lbfgs':
+        # max_iter=1: cada step é uma avaliação, e o histórico de curvatura persiste entre steps
+        optimizer = optim.LBFGS([input_img], lr=1, max_iter=1, history_size=50)
+    else:
+        raise ValueError(f"Otimizador {optimizer_name} não suportado")
+    
+    model.eval()
+    model.requires_grad_(False)
+    
+    print(f'Otimizando com {optimizer_name}...')
+    print('-' * 60)
+    
+    step = 0
+    
+    def closure():
+        with torch.no_grad():
+            input_img.clamp_(0, 1)
+        
+        optimizer.zero_grad()
+        model(input_img)
+        
+        # Perdas por imagem; como cada imagem só depende da própria perda, somar
+        # otimiza o batch inteiro como N execuções independentes
+        style_score = style_weight * sum(sl.loss for sl in style_losses)
+        content_score = content_weight * sum(cl.loss for cl in content_losses)
+        
+        loss = (style_score + content_score).sum()
+        if temporal_target is not None and temporal_weight > 0:
+            difference = (input_img - temporal_target) ** 2
+            if temporal_mask is not None:
+                difference = difference * temporal_mask
+            loss = loss + temporal_weight * difference.mean(dim=(1, 2, 3)).sum()
+        loss.backward()
+        
+        if step % 50 == 0 or step == num_steps - 1:
+            print(f"Iteração {step:3d} | "
+                  f"Estilo: {style_score.sum().item():12.2f} | "
+                  f"Conteúdo: {content_score.sum().item():8.2f} | "
+                  f"Total: {loss.item():12.2f}")
+        return loss
+    
+    start = time.time()
+    previous_loss = None
+    stable_steps = 0
+    converged = False
+    
+    while step < num_steps:
+        current_loss = optimizer.step(closure).item()
+        step += 1
+        
+        # Para quando a variação relativa da perda fica abaixo de tol por `patience` passos
+        if tol is not None and previous_loss is not None:
+            relative_change = abs(previous_loss - current_loss) / max(abs(previous_loss), 1e-12)
+            stable_steps = stable_steps + 1 if relative_change < tol else 0
+            if stable_steps >= patience:
+                converged = True
+                break
+        previous_loss = current_loss
+    
+    elapsed = time.time() - start
+    
+    with torch.no_grad():
+        input_img.clamp_(0, 1)
+    
+    print('-' * 60)
+    if converged:
+        print(f'Convergiu em {step} passos ({elapsed:.1f}s)')
+    else:
+        print(f'Limite de {num_steps} passos atingido ({elapsed:.1f}s)')
+    print('Otimização concluída!')
+    
+    stats = {'steps': step, 'time': elapsed, 'converged': converged,
+             'final_loss': current_loss if step else None}
+    if return_stats:
+        return input_img, stats
+    
+    return input_img
+
+def load_image_batch(image_paths, imsize):
+    """Carrega uma lista de imagens; se todas forem iguais, carrega uma vez só (batch 1)"""
+    if len(set(image_paths)) == 1:
+        return load_image(image_paths[0], imsize)
+    return torch.cat([load_image(path, imsize) for path in image_paths])
+
+def stylize_pairs(cnn, pairs, imsize, batch_size=4, num_steps=300,
+                  style_weights=None, content_weights=None, cache=None,
+                  optimizer_name='adam', tol=None, patience=5):
+    """Estiliza uma lista de pares (conteúdo, estilo) em batches, retornando uma imagem por par"""
+    style_weights = style_weights or [config.style_weight] * len(pairs)
+    content_weights = content_weights or [config.content_weight] * len(pairs)
+    outputs = []
+    
+    for start in range(0, len(pairs), batch_size):
+        chunk = pairs[start:start + batch_size]
+        content_img = load_image_batch([content for content, _ in chunk], imsize)
+        style_img = load_image_batch([style for _, style in chunk], imsize)
+        
+        # Um único conteúdo com vários estilos: replica o conteúdo como ponto de partida
+        input_img = content_img.repeat(len(chunk) // content_img.size(0), 1, 1, 1).clone()
+        
+        print(f"\nBatch {start // batch_size + 1}: {len(chunk)} pares")
+        output = run_style_transfer(
+            cnn, content_img, style_img, input_img,
+            num_steps=num_steps,
+            style_weight=style_weights[start:start + batch_size],
+            content_weight=content_weights[start:start + batch_size],
+            cache=cache,
+            optimizer_name=optimizer_name,
+            tol=tol,
+            patience=patience
+        )
+        outputs.extend(output.detach().split(1))
+    
+    return outputs
+
+def resize_image(image, size):
+    """Redimensiona o tensor para que o maior lado tenha `size` pixels, mantendo a proporção"""
+    height, width = image.shape[-2:]
+    scale = size / max(height, width)
+    new_size = (max(1, round(height * scale)), max(1, round(width * scale)))
+    if new_size == (height, width):
+        return image
+    return nn.functional.interpolate(image, size=new_size, mode='bilinear',
+                                     align_corners=False, antialias=scale < 1).clamp(0, 1)
+
+def run_style_transfer_pyramid(cnn, content_img, style_img, sizes, steps,
+                               style_weight=100000, content_weight=1, cache=None,
+                               optimizer_name='adam', tol=None, patience=5):
+    """Otimiza do nível mais grosso ao mais fino, usando o resultado ampliado como ponto de partida"""
+    if len(sizes) != len(steps):
+        raise ValueError(f"pyramid_sizes ({len(sizes)}) e pyramid_steps ({len(steps)}) "
+                         f"devem ter o mesmo número de níveis")
+    
+    output = None
+    for level, (size, level_steps) in enumerate(zip(sizes, steps)):
+        level_content = resize_image(content_img, size)
+        level_style = resize_image(style_img, size)
+        
+        if output is None:
+            input_img = level_content.clone()
+        else:
+            input_img = nn.functional.interpolate(output.detach(), size=level_content.shape[-2:],
+                                                  mode='bilinear', align_corners=False).clamp(0, 1)
+        
+        height, width = level_content.shape[-2:]
+        print(f"\nNível {level + 1}/{len(sizes)}: {height}x{width}, {level_steps} passos")
+        output = run_style_transfer(
+            cnn, level_content, level_style, input_img,
+            num_steps=level_steps,
+            style_weight=style_weight,
+            content_weight=content_weight,
+            cache=cache,
+            optimizer_name=optimizer_name,
+            tol=tol,
+            patience=patience
+        )
+    
+    return output
+
+def _tile_starts(length, tile_size, overlap):
+    """Posições iniciais dos tiles ao longo de um eixo, cobrindo toda a imagem"""
+    if length <= tile_size:
+        return [0]
+    starts = list(range(0, length - tile_size + 1, tile_size - overlap))
+    if starts[-1] + tile_size < length:
+        starts.append(length - tile_size)
+    return starts
+
+def _blend_window(height, width, overlap):
+    """Peso de cada pixel do tile: rampa linear nas bordas para suavizar as emendas"""
+    def ramp(length):
+        positions = torch.arange(length, dtype=torch.float)
+        return torch.minimum(torch.ones(length),
+                             torch.minimum(positions + 1, length - positions) / max(overlap, 1))
+    return ramp(height)[:, None] * ramp(width)[None, :]
+
+def run_tiled_style_transfer(cnn, content_img, style_img, tile_size=512, overlap=64,
+                             workers=2, num_steps=300, style_weight=100000, content_weight=1,
+                             optimizer_name='adam', tol=None, patience=5):
+    """Estiliza uma imagem grande em tiles sobrepostos, com alvos de estilo globais compartilhados"""
+    if overlap >= tile_size:
+        raise ValueError(f"tile_overlap ({overlap}) deve ser menor que tile_size ({tile_size})")
+    
+    # A imagem inteira fica na CPU; só os tiles em processamento vão para o device
+    content_img = content_img.cpu()
+    _, channels, height, width = content_img.shape
+    
+    # Gram é normalizada por C*H*W, então alvos calculados no tamanho do tile valem para todos
+    style_targets = compute_style_targets(cnn, resize_image(style_img, tile_size),
+                                          config.style_layers)
+    
+    tiles = [(y, x) for y in _tile_starts(height, tile_size, overlap)
+             for x in _tile_starts(width, tile_size, overlap)]
+    print(f"\nImagem {height}x{width} dividida em {len(tiles)} tiles de até {tile_size}px")
+    
+    def stylize_tile(position):
+        y, x = position
+        tile = content_img[:, :, y:y + tile_size, x:x + tile_size].to(device)
+        output = run_style_transfer(
+            cnn, tile, None, tile.clone(),
+            num_steps=num_steps,
+            style_weight=style_weight,
+            content_weight=content_weight,
+            optimizer_name=optimizer_name,
+            tol=tol,
+            patience=patience,
+            style_targets=style_targets
+        )
+        return position, output.detach().cpu()
+    
+    result = torch.zeros(1, channels, height, width)
+    weights = torch.zeros(1, 1, height, width)
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for done, ((y, x), output) in enumerate(executor.map(stylize_tile, tiles), start=1):
+            tile_height, tile_width = output.shape[-2:]
+            window = _blend_window(tile_height, tile_width, overlap)
+            result[:, :, y:y + tile_height, x:x + tile_width] += output * window
+            weights[:, :, y:y + tile_height, x:x + tile_width] += window
+            print(f"Tile {done}/{len(tiles)} concluído")
+    
+    return (result / weights).clamp(0, 1)
+
+def iter_video_frames(video_path, max_frames=None):
+    """Decodifica o vídeo frame a frame (generator, BGR uint8)"""
+    try:
+        import cv2
+    except ImportError:
+        raise ImportError("Estilização de vídeo requer opencv-python (pip install opencv-python)")
+    
+    capture = cv2.VideoCapture(video_path)
+    if not capture.isOpened():
+        raise ValueError(f"Não foi possível abrir o vídeo {video_path}")
+    
+    try:
+        count = 0
+        while max_frames is None or count < max_frames:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            yield frame
+            count += 1
+    finally:
+        capture.release()
+
+def frame_to_tensor(frame, imsize=None):
+    """Converte um frame BGR uint8 em tensor (1, 3, H, W) no device, maior lado = imsize"""
+    image = torch.from_numpy(frame[:, :, ::-1].copy()).permute(2, 0, 1).unsqueeze(0)
+    image = image.to(device, torch.float) / 255
+    return resize_image(image, imsize) if imsize is not None else image
+
+def tensor_to_frame(tensor):
+    """Converte um tensor (1, 3, H, W) em [0, 1] em frame BGR uint8"""
+    image = (tensor_to_image(tensor) * 255).round().astype(np.uint8)
+    return np.ascontiguousarray(image[:, :, ::-1])
+
+def stylize_frames(cnn, frames, style_img, first_steps=300, later_steps=50,
+                   style_weight=100000, content_weight=1, temporal_weight=0.0,
+                   optimizer_name='adam', tol=None, patience=5):
+    """Estiliza uma sequência de frames (generator), cada um partindo do resultado anterior
+
+    Os alvos de estilo são calculados uma vez para o clipe inteiro. A perda temporal
+    (temporal_weight > 0) mantém estáveis os pixels que quase não mudaram entre frames.
+    """
+    style_targets = None
+    previous_frame = None
+    previous_output = None
+    
+    for idx, frame in enumerate(frames):
+        if style_targets is None:
+            style_targets = compute_style_targets(cnn, resize_image(style_img, max(frame.shape[-2:])),
+                                                  config.style_layers)
+        
+        if previous_output is None:
+            input_img = frame.clone()
+            temporal_mask = None
+        else:
+            input_img = previous_output.clone()
+            # Peso alto onde o conteúdo não mudou, baixo onde houve movimento
+            change = (frame - previous_frame).abs().mean(dim=1, keepdim=True)
+            temporal_mask = torch.exp(-change * 20)
+        
+        start = time.time()
+        output, stats = run_style_transfer(
+            cnn, frame, None, input_img,
+            num_steps=first_steps if previous_output is None else later_steps,
+            style_weight=style_weight,
+            content_weight=content_weight,
+            optimizer_name=optimizer_name,
+            tol=tol,
+            patience=patience,
+            return_stats=True,
+            style_targets=style_targets,
+            temporal_target=previous_output,
+            temporal_mask=temporal_mask,
+            temporal_weight=temporal_weight
+        )
+        print(f"Frame {idx}: {stats['steps']} passos em {time.time() - start:.1f}s")
+        
+        previous_frame = frame
+        previous_output = output.detach()
+        yield previous_output
+
+def stylize_video(cnn, video_path, style_img, output_path, imsize=None,
+                  first_steps=300, later_steps=50, temporal_weight=0.0, max_frames=None,
+                  style_weight=100000, content_weight=1, optimizer_name='adam',
+                  tol=None, patience=5):
+    """Decodifica, estiliza e codifica o vídeo em streaming, sem manter o clipe em memória"""
+    import cv2
+    
+    capture = cv2.VideoCapture(video_path)
+    fps = capture.get(cv2.CAP_PROP_FPS) or 30
+    capture.release()
+    
+    frames = (frame_to_tensor(frame, imsize) for frame in iter_video_frames(video_path, max_frames))
+    outputs = stylize_frames(cnn, frames, style_img, first_steps=first_steps,
+                             later_steps=later_steps, style_weight=style_weight,
+                             content_weight=content_weight, temporal_weight=temporal_weight,
+                             optimizer_name=optimizer_name, tol=tol, patience=patience)
+    
+    writer = None
+    count = 0
+    start = time.time()
+    try:
+        for output in outputs:
+            frame = tensor_to_frame(output)
+            if writer is None:
+                height, width = frame.shape[:2]
+                os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+                writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*'mp4v'),
+                                         fps, (width, height))
+            writer.write(frame)
+            count += 1
+    finally:
+        if writer is not None:
+            writer.release()
+    
+    print(f"\n✓ {count} frames estilizados em {time.time() - start:.1f}s, salvos em: {output_path}")
+    return count